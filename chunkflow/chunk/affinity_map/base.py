@@ -1,17 +1,42 @@
 __doc__ = """Image chunk class"""
 import numpy as np
 from chunkflow.chunk import Chunk
+from chunkflow.chunk.reduce import blockwise_map
 
 class AffinityMap(Chunk):
     """
     a chunk of affinity map. It has x,y,z three channels with single precision.
     """
+    __slots__ = ()
+
     def __init__(self, array, global_offset=None):
         super().__init__(array, global_offset=global_offset)
 
-    def quantize(self):
+    def quantize(self, num_threads: int = None):
         # only use the last channel, it is the Z affinity
         # if this is affinitymap
-        image = self[-1, :, :, :]
-        image = (image * 255).astype(np.uint8)
-        return image
+        image = quantize(self.array[-1, :, :, :], num_threads=num_threads)
+        return Chunk(image, global_offset=self.global_offset[1:])
+
+
+def quantize(arr: np.ndarray, num_threads: int = None) -> np.ndarray:
+    """
+    transform the floating point array in [0, 1] to uint8 in multiple 
+    threads. The product is cast to the uint8 output in the small buffer
+    of numpy, so there is no floating point temporary array.
+    """
+    out = np.empty_like(arr, dtype=np.uint8)
+    # split the outermost axis in memory
+    if arr.flags.f_contiguous and not arr.flags.c_contiguous:
+        axis = arr.ndim - 1
+    else:
+        axis = 0
+
+    def _quantize(start, stop):
+        index = (slice(None), ) * axis + (slice(start, stop), )
+        np.multiply(arr[index], 255, out=out[index], casting='unsafe')
+
+    blockwise_map(_quantize, arr.shape[axis], arr.size, 
+                  num_threads=num_threads)
+    return out
+
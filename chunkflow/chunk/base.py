@@ -1,5 +1,6 @@
 from typing import Union
 import os
+from functools import partial
 from numbers import Number
 import h5py
 import numpy as np
@@ -11,11 +12,53 @@ from cloudvolume.lib import Bbox, yellow
 # from typing import Tuple
 # Offset = Tuple[int, int, int]
 from .validate import validate_by_template_matching
+from .reduce import reduce_max, reduce_min, blockwise_map
 
 # from memory_profiler import profile
 
 
-class Chunk(NDArrayOperatorsMixin):
+def _bbox_to_local_slices(bbox: Bbox, global_offset: tuple, shape: tuple):
+    """the local zyx slices of a global bounding box in an array."""
+    slices = tuple(slice(start - offset, stop - offset) for 
+                   start, stop, offset in 
+                   zip(bbox.minpt, bbox.maxpt, global_offset[-3:]))
+    assert all(s.start >= 0 and s.stop <= n for s, n in 
+               zip(slices, shape[-3:])), \
+        f'the bounding box {bbox} is outside of the array.'
+    return slices
+
+
+def _iter_blocks(arr: np.ndarray, block_size: int = 2**20):
+    """
+    iterate the array in blocks of about block_size elements without copy.
+    The contiguous array is split in memory order, and the strided array 
+    is split along the outer axes.
+    """
+    if arr.flags.c_contiguous or arr.flags.f_contiguous:
+        flat = arr.ravel(order='K')
+        for start in range(0, max(flat.size, 1), block_size):
+            yield flat[start : start + block_size]
+    elif arr.ndim > 1 and arr.size > block_size:
+        step = max(1, block_size * arr.shape[0] // arr.size)
+        for start in range(0, arr.shape[0], step):
+            if step == 1:
+                yield from _iter_blocks(arr[start], block_size)
+            else:
+                yield arr[start : start + step]
+    else:
+        yield arr
+
+
+# NDArrayOperatorsMixin has no __slots__, so its subclasses would still get
+# a __dict__. The slotted copy keeps the operators and drops the __dict__.
+_SlottedOperatorsMixin = type(
+    '_SlottedOperatorsMixin', (),
+    {**{key: value for key, value in vars(NDArrayOperatorsMixin).items()
+        if key not in ('__dict__', '__weakref__')},
+     '__slots__': ()})
+
+
+class Chunk(_SlottedOperatorsMixin):
     r"""
        Chunk 
     
@@ -28,17 +71,21 @@ class Chunk(NDArrayOperatorsMixin):
     :param global_offset: the offset of this array chunk
     :return: a new chunk with array data and global offset
     """
+    # there are hundreds of thousands of patch chunks in inference, 
+    # so we keep the object compact and cache the derived metadata.
+    __slots__ = ('_array', '_global_offset', '_slices', '_bbox')
+
     def __init__(self, array, global_offset: tuple = None):
         assert isinstance(array, np.ndarray) or isinstance(array, Chunk)
-        self.array = array
-        if global_offset is None:
-            if isinstance(array, Chunk):
-                self.array = array.array
+        if isinstance(array, Chunk):
+            if global_offset is None:
                 global_offset = array.global_offset
-            else:
-                global_offset = tuple(np.zeros(array.ndim, dtype=np.int))
+            array = array.array
+        elif global_offset is None:
+            global_offset = (0, ) * array.ndim
+        self._array = array
         self.global_offset = global_offset
-        assert array.ndim == len(global_offset)
+        assert array.ndim == len(self._global_offset)
         
     # One might also consider adding the built-in list type to this
     # list, to support operations like np.add(array_like, list)
@@ -89,9 +136,62 @@ class Chunk(NDArrayOperatorsMixin):
         return cls(chunk, global_offset=voxel_offset)
 
     @classmethod
-    def from_tif(cls, file_name: str, global_offset: tuple=None):
-        arr = tifffile.imread(file_name)
+    def from_tif(cls, file_name: str, global_offset: tuple=None, 
+                 bbox: Bbox = None, memmap: bool = False):
+        """
+        Parameters
+        ------------
+        file_name:
+            the tif file.
+        global_offset:
+            the offset of the image in the file.
+        bbox:
+            the zyx bounding box to cut out in global coordinate.
+            If every page is a section, only the pages inside the 
+            bounding box will be read.
+        memmap:
+            map the uncompressed image rather than reading it into memory.
+            The modification of the chunk will not be written to the file.
+            The compressed image will be read as usual.
+        """
+        arr = None
+        if memmap:
+            try:
+                # copy on write
+                arr = tifffile.memmap(file_name, mode='c')
+            except ValueError:
+                print(yellow(f'the image is not memory-mappable: {file_name}'))
+
+        if bbox is None:
+            if arr is None:
+                arr = tifffile.imread(file_name)
+            return cls(arr, global_offset=global_offset)
+
+        if arr is not None:
+            if global_offset is None:
+                global_offset = (0, ) * arr.ndim
+            slices = _bbox_to_local_slices(bbox, global_offset, arr.shape)
+            arr = arr[(slice(None), ) * (arr.ndim - 3) + slices]
+            global_offset = tuple(global_offset[:-3]) + tuple(bbox.minpt)
+            return cls(arr, global_offset=global_offset)
+
+        with tifffile.TiffFile(file_name) as tif:
+            shape = tif.series[0].shape
+            if global_offset is None:
+                global_offset = (0, ) * len(shape)
+            slices = _bbox_to_local_slices(bbox, global_offset, shape)
+
+            if len(shape) == 3 and len(tif.pages) == shape[0]:
+                # read the sections inside the bounding box
+                arr = tif.asarray(key=range(slices[0].start, slices[0].stop))
+                arr = np.reshape(arr, (slices[0].stop - slices[0].start, 
+                                       *shape[1:]))
+                arr = arr[:, slices[1], slices[2]]
+            else:
+                arr = tif.asarray()
+                arr = arr[(slice(None), ) * (arr.ndim - 3) + slices]
 
+        global_offset = tuple(global_offset[:-3]) + tuple(bbox.minpt)
         return cls(arr, global_offset=global_offset)
     
     def to_tif(self, file_name: str=None, global_offset: tuple=None):
@@ -103,48 +203,242 @@ class Chunk(NDArrayOperatorsMixin):
             # visualization in float32 is not working correctly in ImageJ
             # this might not work correctly if you want to save the image as it is!
             print(yellow('transforming data type from float32 to uint8'))
-            img = self.array*255 
-            img = img.astype( np.uint8 )
+            dtype = np.uint8
         else:
-            img = self.array
-        tifffile.imwrite(file_name, data=img)
+            dtype = self.array.dtype
+
+        def _pages():
+            # write page by page, so there is no full size temporary array.
+            # the pages are views even if the array is not contiguous.
+            for idx in np.ndindex(self.shape[:-2]):
+                page = self.array[idx]
+                if dtype != self.array.dtype:
+                    page = (page * 255).astype(dtype)
+                yield page
+
+        with tifffile.TiffWriter(file_name) as tif:
+            tif.write(_pages(), shape=self.shape, dtype=dtype)
 
     @classmethod
     def from_h5(cls, file_name: str,
                 dataset_path: str = '/main',
-                global_offset: tuple = None):
-
+                global_offset: tuple = None,
+                bbox: Bbox = None):
+        """
+        Parameters
+        ------------
+        file_name:
+            the HDF5 file.
+        dataset_path:
+            the dataset path inside the file.
+        global_offset:
+            the offset of the dataset. It will be read from the file if 
+            it is None.
+        bbox:
+            the zyx bounding box to cut out in global coordinate.
+            Only the hyperslab inside the bounding box will be read, 
+            so we do not need to load the whole dataset.
+        """
         assert os.path.exists(file_name)
         assert h5py.is_hdf5(file_name)
 
         print('read from HDF5 file: {}'.format(file_name))
 
-        global_offset_path = os.path.join(os.path.dirname(file_name),
-                                       'global_offset')
         with h5py.File(file_name, 'r') as f:
-            arr = np.asarray(f[dataset_path])
-
+            dset = f[dataset_path]
             if global_offset is None:
-                if global_offset_path in f:
-                    global_offset = tuple(f[global_offset_path])
+                if '/global_offset' in f:
+                    global_offset = tuple(f['/global_offset'])
+                else:
+                    global_offset = (0, ) * dset.ndim
+            
+            if bbox is None:
+                arr = dset[()]
+            else:
+                slices = _bbox_to_local_slices(bbox, global_offset, dset.shape)
+                arr = dset[(slice(None), ) * (dset.ndim - 3) + slices]
+                global_offset = tuple(global_offset[:-3]) + tuple(bbox.minpt)
 
         print('global offset: {}'.format(global_offset))
 
         return cls(arr, global_offset=global_offset)
 
-    def to_h5(self, file_name: str):
+    def to_h5(self, file_name: str, chunk_size: tuple = None,
+              compression: str = None):
+        """
+        Parameters
+        ------------
+        file_name:
+            the HDF5 file.
+        chunk_size:
+            the zyx chunk shape of HDF5 dataset. All the channels are 
+            stored in one chunk. It is automatically choosen with compression.
+        compression:
+            the compression filter, gzip, lzf or blosc. 
+            The blosc filter requires hdf5plugin.
+        """
         assert '.h5' in file_name
 
         print('write chunk to file: ', file_name)
         if os.path.exists(file_name):
             os.remove(file_name)
 
+        kwargs = dict()
+        if chunk_size is not None:
+            chunks = tuple(min(c, s) for c, s in 
+                           zip(chunk_size, self.shape[-3:]))
+            kwargs['chunks'] = tuple(self.shape[:-3]) + chunks
+        if compression == 'blosc':
+            try:
+                import hdf5plugin
+                kwargs.update(hdf5plugin.Blosc())
+            except ImportError:
+                print(yellow('hdf5plugin is not installed, use gzip instead of blosc.'))
+                kwargs['compression'] = 'gzip'
+        elif compression is not None:
+            kwargs['compression'] = compression
+
         with h5py.File(file_name, 'w') as f:
-            f.create_dataset('/main', data=self.array)
+            f.create_dataset('/main', data=self.array, **kwargs)
             f.create_dataset('/global_offset', data=self.global_offset)
+
+    @staticmethod
+    def _open_zarr(path: str, mode: str, **kwargs):
+        """open zarr array. The path ending with .n5 is opened as N5."""
+        # zarr is an optional dependency
+        import zarr
+        if path.rstrip('/').endswith('.n5'):
+            path = zarr.N5Store(path)
+        return zarr.open(path, mode=mode, **kwargs)
+
+    @classmethod
+    def from_zarr(cls, path: str, bbox: Bbox = None):
+        """
+        Parameters
+        ------------
+        path:
+            the zarr array directory. The path ending with .n5 is read as N5.
+        bbox:
+            the zyx bounding box to cut out in global coordinate.
+            Only the storage chunks intersecting with it will be read.
+        """
+        print('read from zarr: {}'.format(path))
+        z = cls._open_zarr(path, 'r')
+        global_offset = tuple(z.attrs.get('global_offset', (0, ) * z.ndim))
+        if bbox is None:
+            arr = z[...]
+        else:
+            slices = _bbox_to_local_slices(bbox, global_offset, z.shape)
+            arr = z[(slice(None), ) * (z.ndim - 3) + slices]
+            global_offset = global_offset[:-3] + tuple(bbox.minpt)
+        return cls(arr, global_offset=global_offset)
+
+    @classmethod
+    def create_zarr(cls, path: str, volume_offset: tuple, volume_size: tuple,
+                    chunk_size: tuple, dtype: str = 'float32', 
+                    num_channels: int = None, compression: str = 'blosc'):
+        """
+        create the zarr array with global offset before writing chunks.
+        It should be created once rather than in every task. 
+        The existing array is opened without any modification.
+
+        Parameters
+        ------------
+        path:
+            the zarr array directory. The path ending with .n5 is created as N5.
+        volume_offset:
+            the zyx offset of the whole array.
+        volume_size:
+            the zyx size of the whole array.
+        chunk_size:
+            the zyx size of storage chunks. All the channels are stored 
+            in one chunk. The task chunks should be aligned with it.
+        dtype:
+            the data type of array.
+        num_channels:
+            the number of channels. The array is 3D if it is None.
+        compression:
+            blosc, gzip or None.
+        """
+        import numcodecs
+        try:
+            z = cls._open_zarr(path, 'r')
+            print(yellow(f'the zarr array already exists: {path}'))
+            return z
+        except ValueError:
+            pass
+
+        if compression == 'blosc':
+            compressor = numcodecs.Blosc(cname='zstd', clevel=5, 
+                                         shuffle=numcodecs.Blosc.BITSHUFFLE)
+        elif compression == 'gzip':
+            compressor = numcodecs.GZip()
+        else:
+            compressor = None
+
+        channels = () if num_channels is None else (num_channels, )
+        print('create zarr array: ', path)
+        z = cls._open_zarr(path, 'w-', shape=channels + tuple(volume_size),
+                           chunks=channels + tuple(chunk_size), 
+                           dtype=dtype, compressor=compressor)
+        z.attrs['global_offset'] = [0, ] * len(channels) + \
+            [int(o) for o in volume_offset]
+        return z
+
+    def to_zarr(self, path: str, num_threads: int = None):
+        """
+        write the chunk into an existing zarr array created by 
+        `create_zarr`, so multiple tasks could write to the same array.
+        The chunk should be aligned with the storage chunks, so every 
+        storage chunk is written as a whole without reading it.
+
+        Parameters
+        ------------
+        path:
+            the zarr array directory. The path ending with .n5 is written as N5.
+        num_threads:
+            the number of threads for blosc compression.
+        """
+        import numcodecs
+        print('write chunk to zarr: ', path)
+        if num_threads:
+            numcodecs.blosc.set_nthreads(num_threads)
+
+        try:
+            z = self._open_zarr(path, 'r+')
+        except ValueError:
+            raise ValueError(f'the zarr array does not exist: {path}. ' + 
+                             'create it with create-zarr first.')
+        global_offset = z.attrs['global_offset']
+
+        slices = tuple(slice(start - offset, start - offset + size) for 
+                       start, offset, size in 
+                       zip(self.global_offset[-3:], global_offset[-3:], 
+                           self.shape[-3:]))
+        if not all(s.start >= 0 and s.stop <= n for s, n in 
+                   zip(slices, z.shape[-3:])):
+            raise ValueError(f'the chunk {self.bbox} is outside of the array.')
+        # the partially covered storage chunks would be read and modified, 
+        # and concurrent tasks could overwrite each other.
+        if any(s.start % c or (s.stop % c and s.stop != n) for s, c, n in 
+               zip(slices, z.chunks[-3:], z.shape[-3:])):
+            raise ValueError(f'the chunk {self.bbox} is not aligned with ' + 
+                             f'the storage chunk size {z.chunks[-3:]}.')
+        z[(slice(None), ) * (self.ndim - 3) + slices] = self.array
     
     def __array__(self):
         return self.array
+
+    def __array_function__(self, func, types, args, kwargs):
+        """
+        the common shape operations and reductions keep the global offset. 
+        The other numpy functions work on the unwrapped arrays.
+        """
+        if not all(issubclass(t, (np.ndarray, Chunk)) for t in types):
+            return NotImplemented
+        if func in _HANDLED_FUNCTIONS:
+            return _HANDLED_FUNCTIONS[func](*args, **kwargs)
+        return func(*_unwrap(args), **_unwrap(kwargs))
     
     def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
         """
@@ -160,6 +454,12 @@ class Chunk(NDArrayOperatorsMixin):
             if not isinstance(x, self._HANDLED_TYPES + (Chunk,)):
                 return NotImplemented
 
+        chunks = [x for x in inputs + out if isinstance(x, Chunk)]
+        if method == '__call__' and len(chunks) > 1 and \
+                all(c.ndim == chunks[0].ndim for c in chunks) and \
+                any(c.slices != chunks[0].slices for c in chunks[1:]):
+            return self._overlap_ufunc(ufunc, chunks, inputs, out, kwargs)
+
         # Defer to the implementation of the ufunc on unwrapped values.
         inputs = tuple(x.array if isinstance(x, Chunk) else x
                        for x in inputs)
@@ -183,6 +483,47 @@ class Chunk(NDArrayOperatorsMixin):
         else:
             return result
 
+    def _overlap_ufunc(self, ufunc, chunks, inputs, out, kwargs):
+        """
+        compute the ufunc in the intersection of chunk bounding boxes.
+        The chunks are sliced as views, so there is no aligned copy. 
+        The output chunks are only modified in the intersection.
+        The other operands could only be scalars, since the arrays 
+        without offset could not be aligned.
+        """
+        for x in inputs + out:
+            if not isinstance(x, Chunk) and np.ndim(x) > 0:
+                raise ValueError(
+                    f'{ufunc.__name__} of misaligned chunks does not support '
+                    'array operands without global offset, convert them '
+                    'to chunks first.')
+
+        overlap = []
+        for slices in zip(*(c.slices for c in chunks)):
+            start = max(s.start for s in slices)
+            stop = min(s.stop for s in slices)
+            # the intersection could be empty
+            overlap.append(slice(start, max(start, stop)))
+        overlap = tuple(overlap)
+        starts = tuple(s.start for s in overlap)
+
+        def _view(x):
+            if isinstance(x, Chunk):
+                return x.array[x._get_internal_slices(overlap)]
+            return x
+
+        inputs = tuple(_view(x) for x in inputs)
+        if out:
+            kwargs['out'] = tuple(_view(x) for x in out)
+        result = ufunc(*inputs, **kwargs)
+
+        if out:
+            return out[0] if len(out) == 1 else out
+        elif type(result) is tuple:
+            return tuple(type(self)(x, global_offset=starts) for x in result)
+        else:
+            return type(self)(result, global_offset=starts)
+
     def __getitem__(self, index):
         return self.array[index]
     
@@ -197,19 +538,47 @@ class Chunk(NDArrayOperatorsMixin):
             return np.array_equal(self.array, value.array) and np.array_equal(
                 self.global_offset, value.global_offset)
         elif isinstance(value, Number):
-            return np.all(self.array==value)
+            if value == 0:
+                return self.is_all_zero()
+            return all(np.all(block == value) for block in 
+                       _iter_blocks(self._array))
         elif isinstance(value, np.ndarray):
             return np.all(self.array == value)
         else:
             raise NotImplementedError
 
+    @property
+    def array(self) -> np.ndarray:
+        return self._array
+
+    @array.setter
+    def array(self, array: np.ndarray):
+        if array.shape != self._array.shape:
+            self._slices = None
+            self._bbox = None
+        self._array = array
+
+    @property
+    def global_offset(self) -> tuple:
+        return self._global_offset
+
+    @global_offset.setter
+    def global_offset(self, global_offset: tuple):
+        # a tuple of python integers is faster to index and add than 
+        # numpy array or Vec
+        self._global_offset = tuple(int(o) for o in global_offset)
+        self._slices = None
+        self._bbox = None
+
     @property
     def slices(self) -> tuple:
         """
         :getter: the global slice in the big volume
         """
-        return tuple(
-            slice(o, o + s) for o, s in zip(self.global_offset, self.shape))
+        if self._slices is None:
+            self._slices = tuple(slice(o, o + s) for o, s in 
+                                 zip(self._global_offset, self._array.shape))
+        return self._slices
 
     @property
     def is_image(self) -> bool:
@@ -227,21 +596,48 @@ class Chunk(NDArrayOperatorsMixin):
     @property
     def bbox(self) -> Bbox:
         """
-        :getter: the cloudvolume bounding box in the big volume
+        :getter: the cloudvolume bounding box in the big volume. 
+            It is cached, so do not modify it in place.
         """
-        return Bbox.from_delta(self.global_offset, self.array.shape)
+        if self._bbox is None:
+            self._bbox = Bbox.from_delta(self._global_offset, self._array.shape)
+        return self._bbox
     
     @property
     def ndim(self) -> int:
-        return self.array.ndim 
+        return self._array.ndim 
 
     @property 
     def shape(self) -> tuple:
-        return self.array.shape 
+        return self._array.shape 
     
     @property 
     def dtype(self) -> np.dtype:
-        return self.array.dtype 
+        return self._array.dtype 
+
+    @property
+    def layout(self) -> str:
+        """
+        :getter: the memory layout of array. 'C' for C order, 'F' for Fortran 
+            order and 'strided' for non-contiguous view, such as cropped chunk.
+        """
+        if self.array.flags['C_CONTIGUOUS']:
+            return 'C'
+        elif self.array.flags['F_CONTIGUOUS']:
+            return 'F'
+        else:
+            return 'strided'
+
+    def ascontiguousarray(self):
+        """
+        :return: a chunk with C ordered array. 
+            The array is only copied if it is not in C order.
+        """
+        if self.layout == 'C':
+            return self
+        else:
+            return type(self)(np.ascontiguousarray(self.array),
+                              global_offset=self.global_offset)
     
     def astype(self, dtype: np.dtype):
         if dtype != self.array.dtype:
@@ -251,10 +647,18 @@ class Chunk(NDArrayOperatorsMixin):
             return self
     
     def max(self, *args, **kwargs):
-        return self.array.max(args, kwargs)
+        """
+        the maximum of the whole chunk is reduced by multiple threads. 
+        With axis, it is the same with np.max and keeps the offsets.
+        """
+        if not args and not kwargs:
+            return reduce_max(self._array)
+        return np.max(self, *args, **kwargs)
 
     def min(self, *args, **kwargs):
-        return self.array.min(args, kwargs)
+        if not args and not kwargs:
+            return reduce_min(self._array)
+        return np.min(self, *args, **kwargs)
 
     def transpose(self):
         """To-Do: support arbitrary axis transpose"""
@@ -268,19 +672,39 @@ class Chunk(NDArrayOperatorsMixin):
     def squeeze_channel(self) -> np.ndarray:
         """given a 4D array, squeeze the channel axis."""
         assert self.array.ndim == 4
-        axis = 0
-        arr = np.squeeze(self, axis=0)
-        global_offset = self.global_offset[:axis] + self.global_offset[axis+1:]
-        return Chunk(arr, global_offset=global_offset)
+        return np.squeeze(self, axis=0)
+
+    def any_nonzero(self, block_size: int = 2**20) -> bool:
+        """
+        check whether there is any nonzero voxel. The array is scanned 
+        block by block and it stops at the first nonzero block, 
+        so there is no full size temporary boolean array.
+        """
+        return any(block.any() for block in 
+                   _iter_blocks(self._array, block_size))
+
+    def is_all_zero(self, block_size: int = 2**20) -> bool:
+        """check whether all the voxels are zero with early exit."""
+        return not self.any_nonzero(block_size=block_size)
     
     # @profile(precision=0)
-    def channel_voting(self):
+    def channel_voting(self, num_threads: int = None):
+        """
+        the channel with max intensity wins. The sections are voted in 
+        multiple threads, and the argmax copy is only one section.
+        """
         assert self.ndim == 4
         assert self.shape[0] <= 256
+        arr = self._array
         out = np.empty(self.shape[1:], dtype=np.uint8)
-        np.argmax(self.array, axis=0, out=out)
-        # our selected channel index start from 1
-        out += 1
+
+        def _vote(start, stop):
+            for z in range(start, stop):
+                np.argmax(arr[:, z], axis=0, out=out[z])
+            # our selected channel index start from 1
+            out[start:stop] += 1
+
+        blockwise_map(_vote, out.shape[0], arr.size, num_threads=num_threads)
         return Chunk(out, global_offset=self.global_offset[1:])
 
     def mask_using_last_channel(self, threshold: float = 0.3) -> np.ndarray:
@@ -341,8 +765,7 @@ class Chunk(NDArrayOperatorsMixin):
         :return: sum up result.
         """
         assert isinstance(other, Chunk)
-        overlap_slices = self._get_overlap_slices(other.slices)
-        self.array[overlap_slices] += other.array[overlap_slices]
+        np.add(self, other, out=self)
 
     def cutout(self, slices: tuple):
         """
@@ -351,12 +774,10 @@ class Chunk(NDArrayOperatorsMixin):
         :param slices: the global slices of region of interest
         :return: another chunk of region of interest
         """
-        if len(slices) == self.ndim - 1:
-            slices = (slice(0, self.shape[0]), ) + slices
-        internalSlices = self._get_internal_slices(slices)
-        arr = self.array[internalSlices]
-        global_offset = tuple(s.start for s in slices)
-        return Chunk(arr, global_offset=global_offset)
+        if len(slices) == self._array.ndim - 1:
+            slices = (slice(0, self._array.shape[0]), ) + slices
+        arr = self._array[self._get_internal_slices(slices)]
+        return Chunk(arr, global_offset=tuple(s.start for s in slices))
 
     def save(self, patch):
         """
@@ -364,35 +785,27 @@ class Chunk(NDArrayOperatorsMixin):
 
         :param patch: a small chunk to replace subvolume
         """
-        internalSlices = self._get_internal_slices(patch.slices)
-        self.array[internalSlices] = patch.array
+        self._array[self._get_internal_slices(patch.slices)] = patch.array
 
     def blend(self, patch):
         """
         same with add_overlap
         """
-        internal_slices = tuple(
-            slice(max(s.start - o, 0), min(s.stop - o, h)) for s, o, h in 
-            zip(patch.slices, self.global_offset, self.shape)
-        )
-        shape = (s.stop - s.start for s in internal_slices)
-        patch_starts = (
-            i.start - s.start + o for s, o, i in 
-            zip(patch.slices, self.global_offset, internal_slices)
-        )
-        patch_slices = tuple(slice(s, s+h) for s, h in zip(patch_starts, shape))
-
-        self.array[internal_slices] += patch.array[patch_slices]
-
-    def _get_overlap_slices(self, other_slices):
-        return tuple(
-            slice(max(s1.start, s2.start), min(s1.stop, s2.stop))
-            for s1, s2 in zip(self.slices, other_slices))
+        internal_slices = []
+        patch_slices = []
+        for po, ps, o, s in zip(patch.global_offset, patch.shape, 
+                                self._global_offset, self._array.shape):
+            # the overlapping region in the coordinate of this chunk
+            start = max(po - o, 0)
+            stop = min(po + ps - o, s)
+            internal_slices.append(slice(start, stop))
+            patch_slices.append(slice(start + o - po, stop + o - po))
+
+        self._array[tuple(internal_slices)] += patch.array[tuple(patch_slices)]
 
     def _get_internal_slices(self, slices):
-        return tuple(
-            slice(s.start - o, s.stop - o)
-            for s, o in zip(slices, self.global_offset))
+        return tuple(slice(s.start - o, s.stop - o)
+                     for s, o in zip(slices, self._global_offset))
 
 
     def validate(self, verbose: bool = False):
@@ -403,3 +816,90 @@ class Chunk(NDArrayOperatorsMixin):
         """
         validate_by_template_matching(self.array, verbose=verbose)
 
+
+def _unwrap(x):
+    """replace the chunks with their arrays in nested arguments."""
+    if isinstance(x, Chunk):
+        return x.array
+    elif isinstance(x, (list, tuple)):
+        return type(x)(_unwrap(y) for y in x)
+    elif isinstance(x, dict):
+        return {k: _unwrap(v) for k, v in x.items()}
+    return x
+
+
+def _normalize_axes(axis, ndim: int) -> tuple:
+    if isinstance(axis, Number):
+        axis = (axis, )
+    return tuple(a % ndim for a in axis)
+
+
+# the numpy functions implemented for Chunk
+_HANDLED_FUNCTIONS = dict()
+
+
+def _implements(*np_functions):
+    def decorator(func):
+        for np_function in np_functions:
+            _HANDLED_FUNCTIONS[np_function] = func
+        return func
+    return decorator
+
+
+@_implements(np.squeeze)
+def _squeeze(a, axis=None):
+    if axis is None:
+        axes = tuple(i for i, s in enumerate(a.shape) if s == 1)
+    else:
+        axes = _normalize_axes(axis, a.ndim)
+    global_offset = tuple(o for i, o in enumerate(a.global_offset) 
+                          if i not in axes)
+    return Chunk(np.squeeze(a.array, axis=axis), global_offset=global_offset)
+
+
+@_implements(np.transpose)
+def _transpose(a, axes=None):
+    if axes is None:
+        axes = tuple(range(a.ndim))[::-1]
+    global_offset = tuple(a.global_offset[i] for i in axes)
+    return type(a)(np.transpose(a.array, axes), global_offset=global_offset)
+
+
+@_implements(np.flip)
+def _flip(m, axis=None):
+    # the flipped array covers the same region
+    return type(m)(np.flip(m.array, axis=axis), global_offset=m.global_offset)
+
+
+def _reduce(np_function, a, axis=None, *args, **kwargs):
+    """reduce the unwrapped array, the remaining axes keep their offsets."""
+    result = np_function(_unwrap(a), axis, *_unwrap(args), **_unwrap(kwargs))
+    if axis is None or not isinstance(a, Chunk) or \
+            not isinstance(result, np.ndarray) or result.ndim == 0:
+        return result
+    if kwargs.get('keepdims', False):
+        global_offset = a.global_offset
+    else:
+        axes = _normalize_axes(axis, a.ndim)
+        global_offset = tuple(o for i, o in enumerate(a.global_offset) 
+                              if i not in axes)
+    return Chunk(result, global_offset=global_offset)
+
+
+for _np_function in (np.sum, np.mean, np.amax, np.amin, np.max, np.min,
+                     np.count_nonzero):
+    _HANDLED_FUNCTIONS[_np_function] = partial(_reduce, _np_function)
+
+
+@_implements(*(f for f in (np.any, getattr(np, 'sometrue', None)) if f))
+def _any(a, axis=None, *args, **kwargs):
+    if axis is None and not args and not kwargs and isinstance(a, Chunk):
+        return a.any_nonzero()
+    return _reduce(np.any, a, axis, *args, **kwargs)
+
+
+@_implements(*(f for f in (np.all, getattr(np, 'alltrue', None)) if f))
+def _all(a, axis=None, *args, **kwargs):
+    if axis is None and not args and not kwargs and isinstance(a, Chunk):
+        return all(block.all() for block in _iter_blocks(a.array))
+    return _reduce(np.all, a, axis, *args, **kwargs)
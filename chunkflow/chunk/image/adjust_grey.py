@@ -6,6 +6,7 @@
 
 import numpy as np
 from chunkflow.chunk import Chunk
+from chunkflow.chunk.reduce import reduce_max, reduce_min
 
 
 def window_level(img, half_window, level):
@@ -41,10 +42,10 @@ def get_voxels_for_stats(img, min_max_invalid=[True, True], debug=False):
     #TODO clip_percentile = [None,None]
     mask = True
     if min_invalid:
-        mi = np.min(img)
+        mi = reduce_min(img)
         mask = img != mi
     if max_invalid:
-        ma = np.max(img)
+        ma = reduce_max(img)
         mask = np.logical_and(mask, img != ma)
 
     #if quantile
@@ -94,8 +95,8 @@ def normalize(img,
 
     elif method == 2 or method == 'fill':
 
-        mi = np.min(stat_img)
-        ma = np.max(stat_img)
+        mi = reduce_min(stat_img)
+        ma = reduce_max(stat_img)
         if debug:
             print('minmax =', mi, ma)
         img = rescale(img, [mi, ma], new_range=target_scale)
@@ -116,8 +117,8 @@ def adjust_gamma(img, gamma, auto_rescale=False):
 
     #img = np.copy(img)
     if auto_rescale:
-        mi = np.min(img)
-        ma = np.max(img)
+        mi = reduce_min(img)
+        ma = reduce_max(img)
         if mi != ma:
             img -= mi
             img /= ma - mi
@@ -11,6 +11,8 @@ class Image(Chunk):
     """
     a chunk of image volume.
     """
+    __slots__ = ()
+
     def __init__(self, array: np.ndarray, global_offset=None):
         super().__init__(array, global_offset=global_offset)
 
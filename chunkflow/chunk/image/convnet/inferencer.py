@@ -338,7 +338,7 @@ class Inferencer(object):
                 voxel_offset=output_buffer.global_offset
             )
        
-        if input_chunk == 0:
+        if input_chunk.is_all_zero():
             print('input is all zero, return zero buffer directly')
             if self.mask_myelin_threshold:
                 assert output_buffer.shape[0] == 4
@@ -0,0 +1,153 @@
+__doc__ = """
+blockwise multithreaded reductions and operations of large arrays.
+
+The array is split to slabs without copy, and every slab is reduced in a
+thread. numpy releases the GIL in the reduction loops, so the threads run
+in parallel. The partial results are combined at last. The elementwise
+operations write every slab into a preallocated output in the same way.
+
+The package is monkey patched by gevent except the thread module, and the
+queue of a thread pool would be a gevent queue that blocks forever in
+threads. So we use plain threads with a static partition of blocks.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+# the arrays smaller than this number of elements are reduced directly
+MIN_PARALLEL_SIZE = 2**22
+
+
+def split_blocks(arr: np.ndarray, num_blocks: int) -> list:
+    """
+    split the array to views along the outermost axis that is long enough.
+    The blocks of C ordered array are contiguous.
+    """
+    for axis, length in enumerate(arr.shape):
+        if length >= num_blocks:
+            break
+    else:
+        axis = int(np.argmax(arr.shape))
+    return np.array_split(arr, num_blocks, axis=axis)
+
+
+def _run_threads(func, args_list: list) -> list:
+    """call the function with every arguments in a thread and return the results."""
+    results = [None] * len(args_list)
+    errors = []
+
+    def _run(idx):
+        try:
+            results[idx] = func(*args_list[idx])
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=_run, args=(idx, ))
+               for idx in range(len(args_list))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def _get_num_threads(size: int, num_threads: int = None) -> int:
+    if size < MIN_PARALLEL_SIZE:
+        return 1
+    if num_threads is None:
+        num_threads = os.cpu_count()
+    return num_threads
+
+
+def blockwise_reduce(func, arr: np.ndarray, combine,
+                     num_threads: int = None):
+    """
+    Parameters
+    ------------
+    func:
+        the reduction function of one block.
+    arr:
+        the array to reduce.
+    combine:
+        the function to combine the list of block results.
+    num_threads:
+        the number of threads. The default is the number of cores.
+
+    Returns
+    --------
+    the combined result.
+    """
+    num_threads = _get_num_threads(arr.size, num_threads)
+    if num_threads <= 1:
+        return func(arr)
+
+    blocks = split_blocks(arr, num_threads)
+    return combine(_run_threads(func, [(block, ) for block in blocks]))
+
+
+def blockwise_map(func, length: int, size: int, num_threads: int = None):
+    """
+    Parameters
+    ------------
+    func:
+        the function of a range, func(start, stop). It writes the result 
+        of the range into a preallocated output.
+    length:
+        the length of the axis to split.
+    size:
+        the total number of elements. The small array is not split.
+    num_threads:
+        the number of threads. The default is the number of cores.
+    """
+    num_threads = min(_get_num_threads(size, num_threads), length)
+    if num_threads <= 1:
+        func(0, length)
+        return
+    bounds = np.linspace(0, length, num_threads + 1).astype(int)
+    _run_threads(func, list(zip(bounds[:-1], bounds[1:])))
+
+
+def reduce_max(arr: np.ndarray, num_threads: int = None):
+    return blockwise_reduce(np.max, arr, np.max, num_threads=num_threads)
+
+
+def reduce_min(arr: np.ndarray, num_threads: int = None):
+    return blockwise_reduce(np.min, arr, np.min, num_threads=num_threads)
+
+
+def reduce_sum(arr: np.ndarray, dtype: type = None, num_threads: int = None):
+    return blockwise_reduce(lambda x: np.sum(x, dtype=dtype), arr,
+                            lambda x: np.sum(x, dtype=dtype),
+                            num_threads=num_threads)
+
+
+def count_nonzero(arr: np.ndarray, num_threads: int = None) -> int:
+    return blockwise_reduce(np.count_nonzero, arr, sum,
+                            num_threads=num_threads)
+
+
+def histogram(arr: np.ndarray, bins: int = 10, range: tuple = None,
+              num_threads: int = None):
+    """
+    the same with np.histogram, but the bins could only be the number of
+    bins or the bin edges.
+
+    Returns
+    --------
+    hist: the counts of bins.
+    bin_edges: the bin edges with length of len(hist) + 1.
+    """
+    if range is None:
+        range = (reduce_min(arr, num_threads=num_threads),
+                 reduce_max(arr, num_threads=num_threads))
+    # all the blocks use the same bin edges, so the counts add up
+    bin_edges = np.histogram_bin_edges(np.empty(0, dtype=arr.dtype),
+                                       bins=bins, range=range)
+    hist = blockwise_reduce(
+        lambda x: np.histogram(x, bins=bins, range=range)[0], arr,
+        lambda x: np.sum(x, axis=0), num_threads=num_threads)
+    return hist, bin_edges
@@ -13,6 +13,8 @@ class Segmentation(Chunk):
     """
     a chunk of segmentation volume.
     """
+    __slots__ = ()
+
     def __init__(self, array, global_offset=None):
         super().__init__(array, global_offset=global_offset)
         assert array.ndim == 3
@@ -1,12 +1,84 @@
 from tqdm import tqdm
-from itertools import product
+
+import numpy as np
 
 from cloudvolume import CloudVolume
 from cloudvolume.lib import Vec, Bbox
 
+from chunkflow.lib.space_filling_curve import grid_indices
+
+
+class BoundingBoxes(object):
+    """a lazy sequence of bounding boxes in a regular grid.
+
+    The bounding boxes are created on the fly in iteration, so we do not need
+    to hold millions of them in memory for a large volume.
+    The traversal order could follow a space filling curve, so consecutive
+    tasks are spatially close and could reuse the cached data.
+    """
+    def __init__(self, roi_start: Vec, chunk_size: Vec, stride: Vec,
+                 grid_size: Vec, order: str = 'zyx'):
+        self.roi_start = roi_start
+        self.chunk_size = chunk_size
+        self.stride = stride
+        self.grid_size = grid_size
+        self.order = order
+        # the bitmap of excluded grid cells, such as the completed tasks
+        self.excluded = None
+
+    def __len__(self):
+        num = int(np.prod(self.grid_size))
+        if self.excluded is not None:
+            num -= int(np.count_nonzero(self.excluded))
+        return num
+
+    def __iter__(self):
+        for (z, y, x) in grid_indices(self.grid_size, order=self.order):
+            if self.excluded is not None and self.excluded[z, y, x]:
+                continue
+            chunk_start = self.roi_start + Vec(z, y, x) * self.stride
+            yield Bbox.from_delta(chunk_start, self.chunk_size)
+
+    def grid_index(self, bbox: Bbox):
+        """
+        the grid index of a bounding box. 
+        None if the bounding box is not one of the grid cells.
+        """
+        # ignore the channel dimension if there is any
+        start = bbox.minpt[-3:]
+        size = bbox.maxpt[-3:] - start
+        if any(s != c for s, c in zip(size, self.chunk_size)):
+            return None
+
+        idx = []
+        for s, o, t, g in zip(start, self.roi_start, self.stride, self.grid_size):
+            if t == 0:
+                # only one chunk in this dimension
+                i, r = 0, s - o
+            else:
+                i, r = divmod(s - o, t)
+            if r != 0 or i < 0 or i >= g:
+                return None
+            idx.append(int(i))
+        return tuple(idx)
+
+    def exclude(self, bitmap: np.ndarray):
+        """exclude the grid cells which are true in the bitmap."""
+        assert bitmap.shape == tuple(self.grid_size)
+        if self.excluded is None:
+            self.excluded = bitmap.astype(bool)
+        else:
+            self.excluded |= bitmap
+
+    def __repr__(self):
+        return f'{len(self)} bounding boxes with size {self.chunk_size} ' + \
+            f'in grid {self.grid_size} starting from {self.roi_start}'
+
+
 def create_bounding_boxes(chunk_size:tuple, chunk_overlap: tuple=(0,0,0),
                           roi_start: tuple=None, roi_stop: tuple=None, layer_path: str=None,
-                          mip:int=0, grid_size: tuple=None, verbose: bool=True):
+                          mip:int=0, grid_size: tuple=None, verbose: bool=True,
+                          order: str='zyx'):
     if layer_path:
         vol = CloudVolume(layer_path, mip=mip)
         # dataset shape as z,y,x
@@ -49,11 +121,4 @@ def create_bounding_boxes(chunk_size:tuple, chunk_overlap: tuple=(0,0,0),
         print('grid size: ', grid_size)
         print('final output stop: ', final_output_stop)
 
-    bboxes = []
-    for (z, y, x) in product(range(grid_size[0]), 
-                             range(grid_size[1]),
-                             range(grid_size[2])):
-        chunk_start = roi_start + Vec(z, y, x) * stride
-        bbox = Bbox.from_delta(chunk_start, chunk_size)
-        bboxes.append( bbox )
-    return bboxes
+    return BoundingBoxes(roi_start, chunk_size, stride, grid_size, order=order)
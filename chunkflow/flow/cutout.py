@@ -1,3 +1,5 @@
+from time import time
+
 import numpy as np
 from cloudvolume import CloudVolume
 from cloudvolume.lib import Bbox
@@ -6,6 +8,8 @@ from cloudvolume.storage import Storage
 from chunkflow.chunk.validate import validate_by_template_matching
 from tinybrain import downsample_with_averaging
 from chunkflow.chunk import Chunk
+from chunkflow.lib.block_cache import get_block_cache, prune_disk_cache
+from chunkflow.lib.checksum import checksum_path, block_checksums, get_checksums
 from .base import OperatorBase
 
 
@@ -20,7 +24,40 @@ class CutoutOperator(OperatorBase):
                  dry_run: bool = False,
                  name: str = 'cutout',
                  verbose: bool = True,
-                 use_https: bool = True):
+                 use_https: bool = True,
+                 block_cache_size: int = 0,
+                 disk_cache: str = None,
+                 disk_cache_size: int = None,
+                 parallel: int = 1,
+                 green_threads: bool = True,
+                 validate_checksum: bool = False):
+        """
+        Parameters
+        ------------
+        block_cache_size:
+            the maximum size (bytes) of the in-memory cache of storage blocks.
+            The cache is shared by all the cutout operators of the same volume
+            and mip level in a worker. The overlapping margins of neighboring
+            chunks will be reused without downloading again.
+            The default is 0 without cache.
+        disk_cache:
+            the local directory to cache the downloaded files.
+            It could be shared by all the processes in a node.
+        disk_cache_size:
+            the maximum size (bytes) of the disk cache. The oldest files will be
+            deleted. The default is None without limit.
+        parallel:
+            the number of processes to download and decode the storage blocks.
+            Every process uses multiple threads to download, so we only need
+            this for the layers with heavy decoding, such as jpeg and 
+            compressed_segmentation.
+        green_threads:
+            use green threads rather than preemptive threads to download.
+        validate_checksum:
+            compare the storage blocks fully inside the cutout with the 
+            checksum sidecar files written by the save operator.
+            The blocks without sidecar files are not validated.
+        """
         super().__init__(name=name, verbose=verbose)
         self.volume_path = volume_path
         self.mip = mip
@@ -30,22 +67,52 @@ class CutoutOperator(OperatorBase):
         self.blackout_sections = blackout_sections
         self.dry_run = dry_run
         self.use_https = use_https
+        self.block_cache_size = block_cache_size
+        self.disk_cache = disk_cache
+        self.disk_cache_size = disk_cache_size
+        self.parallel = parallel
+        self.green_threads = green_threads
+        self.validate_checksum = validate_checksum
+        # the cache statistics of the last cutout
+        self.cache_stats = None
+        # the download statistics of the last cutout
+        self.download_stats = None
+        self._vol = None
         if blackout_sections:
             with Storage(volume_path) as stor:
                 self.blackout_section_ids = stor.get_json(
                     'blackout_section_ids.json')['section_ids']
 
+    @property
+    def vol(self):
+        """the volume is reused by all the tasks, so the info file is 
+        only fetched once and the connections in pool could be reused."""
+        if self._vol is None:
+            #gevent.monkey.patch_all(thread=False)
+            self._vol = CloudVolume(
+                self.volume_path,
+                bounded=False,
+                fill_missing=self.fill_missing,
+                progress=self.verbose,
+                mip=self.mip,
+                cache=self.disk_cache if self.disk_cache else False,
+                use_https=self.use_https,
+                parallel=self.parallel,
+                green_threads=self.green_threads)
+        return self._vol
+
+    def _download(self, slices):
+        """download a region and return the array in (channel, z, y, x) order."""
+        start = time()
+        # always reverse the indexes since cloudvolume use x,y,z indexing
+        # the cutout is decoded into a fortran ordered xyzc buffer, 
+        # so the transposed czyx array is already C ordered without copy.
+        array = np.asarray(self.vol[slices[::-1]]).transpose()
+        self._download_time += time() - start
+        self._downloaded_bytes += array.nbytes
+        return array
+
     def __call__(self, output_bbox):
-        #gevent.monkey.patch_all(thread=False)
-        vol = CloudVolume(self.volume_path,
-                          bounded=False,
-                          fill_missing=self.fill_missing,
-                          progress=self.verbose,
-                          mip=self.mip,
-                          cache=False,
-                          use_https=self.use_https,
-                          green_threads=True)
-       
         chunk_slices = tuple(
             slice(s.start - m, s.stop + m)
             for s, m in zip(output_bbox.to_slices(), self.expand_margin_size))
@@ -58,13 +125,24 @@ class CutoutOperator(OperatorBase):
             print('cutout {} from {}'.format(chunk_slices[::-1],
                                              self.volume_path))
 
-        # always reverse the indexes since cloudvolume use x,y,z indexing
-        chunk = vol[chunk_slices[::-1]]
-        # the cutout is fortran ordered, so need to transpose and make it C order
-        chunk = chunk.transpose()
-        # we can delay this transpose later
-        # actually we do not need to make it contiguous
-        # chunk = np.ascontiguousarray(chunk)
+        self._download_time = 0.
+        self._downloaded_bytes = 0
+        if self.block_cache_size:
+            chunk = self._cutout_with_block_cache(chunk_slices)
+        else:
+            chunk = self._download(chunk_slices)
+        self.download_stats = {
+            'bytes': self._downloaded_bytes,
+            'seconds': self._download_time,
+            'MB/s': self._downloaded_bytes / 1024 / 1024 / self._download_time \
+                if self._download_time > 0 else None
+        }
+        if self.verbose:
+            print(f'download speed of {self.name}: {self.download_stats}')
+
+        # the chunk is C ordered in both the direct and cached cutout,
+        # so this is not copying. The following operators could rely on it.
+        chunk = np.ascontiguousarray(chunk)
 
         # if the channel number is 1, squeeze it as 3d array
         # this should not be neccessary
@@ -78,14 +156,43 @@ class CutoutOperator(OperatorBase):
         
         chunk = Chunk(chunk, global_offset=global_offset)
 
+        if self.validate_checksum:
+            # validate the downloaded data before any modification
+            self._validate_checksum(chunk)
+
         if self.blackout_sections:
             chunk = self._blackout_sections(chunk)
 
         if self.validate_mip:
-            self._validate_chunk(chunk, vol)
+            self._validate_chunk(chunk, self.vol)
+
+        if self.disk_cache and self.disk_cache_size:
+            prune_disk_cache(self.disk_cache, self.disk_cache_size)
         
         return chunk
 
+    def _cutout_with_block_cache(self, chunk_slices):
+        block_cache = get_block_cache(
+            self.volume_path, self.mip,
+            block_size=self.vol.underlying[::-1],
+            voxel_offset=self.vol.voxel_offset[::-1],
+            max_bytes=self.block_cache_size)
+
+        hits = block_cache.hits
+        misses = block_cache.misses
+        downloaded_bytes = block_cache.downloaded_bytes
+        chunk = block_cache.cutout(chunk_slices, self._download)
+
+        self.cache_stats = {
+            'hits': block_cache.hits - hits,
+            'misses': block_cache.misses - misses,
+            'downloaded_bytes': block_cache.downloaded_bytes - downloaded_bytes,
+            'cached_bytes': block_cache.nbytes
+        }
+        if self.verbose:
+            print(f'block cache of {self.name}: {self.cache_stats}')
+        return chunk
+
     def _blackout_sections(self, chunk):
         """
         make some sections black.
@@ -102,6 +209,23 @@ class CutoutOperator(OperatorBase):
                 chunk[z0, :, :] = 0
         return chunk
 
+    def _validate_checksum(self, chunk):
+        """
+        compare the checksum of storage blocks with the sidecar files.
+        It only needs to download a few bytes for each block.
+        """
+        checksums = block_checksums(chunk.array, chunk.global_offset,
+                                    block_size=self.vol.underlying[::-1],
+                                    voxel_offset=self.vol.voxel_offset[::-1])
+        stored_checksums = get_checksums(
+            checksum_path(self.volume_path, self.vol.key), list(checksums.keys()))
+        if self.verbose:
+            print(f'validate checksum of {len(stored_checksums)} blocks.')
+
+        for file_name, stored_checksum in stored_checksums.items():
+            assert checksums[file_name] == stored_checksum, \
+                f'the checksum of block {file_name} do not match.'
+
     def _validate_chunk(self, chunk, vol):
         """
         check that all the input voxels was downloaded without black region  
@@ -147,7 +271,7 @@ class CutoutOperator(OperatorBase):
         clamped_bbox = Bbox.from_slices(clamped_slices)
         clamped_input = chunk.cutout(clamped_slices[::-1])
         # transform to xyz order
-        clamped_input = np.transpose(clamped_input)
+        clamped_input = np.transpose(clamped_input.array)
         # get the corresponding bounding box for validation
         validate_bbox = vol.bbox_to_mip(clamped_bbox,
                                              mip=chunk_mip,
@@ -1,3 +1,5 @@
+import gevent
+
 from chunkflow.chunk import Chunk
 from .base import OperatorBase
 from cloudvolume import CloudVolume
@@ -52,30 +54,69 @@ class DownsampleUploadOperator(OperatorBase):
         self.stop_mip = stop_mip
 
     def __call__(self, chunk):
-        assert 3 == chunk.ndim 
-        global_offset = chunk.global_offset
-
-        num_mips = self.stop_mip - self.chunk_mip
-
-        # tinybrain use F order and require 4D array!
-        chunk2 = np.transpose(chunk)
-        chunk2 = np.reshape(chunk2, (*chunk2.shape, 1))
-
-        if np.issubdtype(chunk.dtype, np.floating) or chunk.dtype == np.uint8:
-            pyramid = tinybrain.downsample_with_averaging(chunk2,
-                                                          factor=(2, 2, 1),
-                                                          num_mips=num_mips)
-        else:
-            pyramid = tinybrain.downsample_segmentation(chunk2,
-                                                        factor=(2, 2, 1),
-                                                        num_mips=num_mips)
-
-        for mip in range(self.start_mip, self.stop_mip):
-            # the first chunk in pyramid is already downsampled!
-            downsampled_chunk = pyramid[mip - self.chunk_mip - 1]
-            # compute new offset, only downsample the y,x dimensions
-            offset = np.divide(global_offset, np.asarray(
-                        [1, 2**(mip - self.chunk_mip), 2**(mip - self.chunk_mip)]))
-            bbox = Bbox.from_delta(offset, downsampled_chunk.shape[0:3][::-1])
-            # upload downsampled chunk, note that we should use F order in the indexing
-            self.vols[mip][bbox.to_slices()[::-1]] = downsampled_chunk
+        assert chunk.ndim in (3, 4)
+        # the first chunk in pyramid is already downsampled!
+        pyramid = downsample_pyramid(chunk, self.stop_mip - self.chunk_mip - 1)
+        levels = [(self.vols[mip], pyramid[mip - self.chunk_mip - 1],
+                   mip - self.chunk_mip)
+                  for mip in range(self.start_mip, self.stop_mip)]
+        upload_pyramid(levels, chunk.global_offset)
+
+
+def downsample_pyramid(chunk: Chunk, num_mips: int):
+    """
+    downsample the chunk in XY plane recursively.
+
+    Parameters
+    ------------
+    chunk:
+        3D image or segmentation, or 4D image such as affinity map.
+    num_mips:
+        the number of downsampled mip levels.
+
+    Returns
+    --------
+    list of downsampled arrays in xyzc order. The first one is downsampled once.
+    """
+    if num_mips < 1:
+        return []
+    # tinybrain use F order and require 4D array!
+    # the transposed C ordered array is F ordered without copy.
+    arr = np.transpose(chunk.array)
+    if arr.ndim == 3:
+        arr = np.reshape(arr, (*arr.shape, 1))
+
+    if np.issubdtype(chunk.dtype, np.floating) or chunk.dtype == np.uint8:
+        return tinybrain.downsample_with_averaging(arr,
+                                                   factor=(2, 2, 1),
+                                                   num_mips=num_mips)
+    else:
+        return tinybrain.downsample_segmentation(arr,
+                                                 factor=(2, 2, 1),
+                                                 num_mips=num_mips)
+
+
+def upload_pyramid(levels: list, global_offset: tuple):
+    """
+    upload the downsampled arrays concurrently using greenlets.
+
+    Parameters
+    ------------
+    levels:
+        list of (volume, xyzc array, number of downsampling from global offset).
+    global_offset:
+        the offset of the original chunk. Only the last three zyx dimensions are used.
+    """
+    def _upload(vol, arr, num_mips):
+        # compute new offset, only downsample the y,x dimensions
+        z, y, x = global_offset[-3:]
+        offset = (x // 2**num_mips, y // 2**num_mips, z)
+        bbox = Bbox.from_delta(offset, arr.shape[:3])
+        # upload downsampled chunk, note that we should use F order in the indexing
+        vol[bbox.to_slices()] = arr
+
+    # the package was monkey patched, so the uploading greenlets of 
+    # different levels run concurrently
+    greenlets = [gevent.spawn(_upload, *level) for level in levels]
+    # raise the exception of uploading if any
+    gevent.joinall(greenlets, raise_error=True)
@@ -12,7 +12,8 @@ from cloudvolume.lib import Bbox, Vec, yellow
 from cloudvolume import CloudVolume
 from cloudvolume.storage import SimpleStorage
 
-from chunkflow.lib.aws.sqs_queue import SQSQueue
+from chunkflow.lib.task_queue import get_queue
+from chunkflow.lib.completion_index import CompletionIndex
 from chunkflow.chunk import Chunk
 from chunkflow.chunk.affinity_map import AffinityMap
 from chunkflow.chunk.segmentation import Segmentation
@@ -54,6 +55,16 @@ def handle_task_skip(task, name):
         task['skip'] = False
 
 
+def _expand_task_bbox(task, expand_margin_size):
+    """the task bounding box with margin. It is None if the task do not have one."""
+    bbox = task.get('bbox', None)
+    if bbox is None:
+        return None
+    return Bbox.from_slices(tuple(
+        slice(s.start - m, s.stop + m) 
+        for s, m in zip(bbox.to_slices()[-3:], expand_margin_size)))
+
+
 def default_none(ctx, _, value):
     """
     click currently can not use None with tuple type
@@ -148,18 +159,51 @@ def generator(func):
               type=int, default=None, nargs=3, callback=default_none,
               help='(z y x), grid size of output blocks')
 @click.option('--queue-name', '-q',
-              type=str, default=None, help='sqs queue name')
+              type=str, default=None,
+              help='sqs queue name or local queue path, such as sqlite:///tmp/tasks.db')
+@click.option('--order', '-r',
+              type=click.Choice(['zyx', 'morton', 'hilbert']), default='zyx',
+              help='task order. morton and hilbert follow space filling curves ' +
+              'to process neighboring chunks consecutively.')
+@click.option('--skip-completed',
+              type=str, default=None,
+              help='skip the tasks completed in this volume. ' +
+              'the completed tasks are found from the log files in volume/log.')
+@click.option('--mask-volume',
+              type=str, default=None,
+              help='mask volume path. the tasks without any foreground mask ' +
+              'voxel will not be generated.')
+@click.option('--mask-mip',
+              type=int, default=5, help='mip level of mask.')
+@click.option('--mask-inverse/--no-mask-inverse',
+              default=False, help='inverse the mask or not.')
+@click.option('--mask-fill-missing/--no-mask-fill-missing',
+              default=False, help='fill missing blocks of mask with black or not.')
 @generator
 def generate_tasks(layer_path, mip, roi_start, chunk_size, 
-                   grid_size, queue_name):
+                   grid_size, queue_name, order, skip_completed,
+                   mask_volume, mask_mip, mask_inverse, mask_fill_missing):
     """Generate tasks."""
     bboxes = create_bounding_boxes(
         chunk_size, layer_path=layer_path,
         roi_start=roi_start, mip=mip, grid_size=grid_size,
-        verbose=state['verbose'])
+        verbose=state['verbose'], order=order)
+
+    if mask_volume:
+        mask_operator = MaskOperator(mask_volume, mask_mip, mip,
+                                     inverse=mask_inverse,
+                                     fill_missing=mask_fill_missing,
+                                     verbose=state['verbose'])
+        bboxes.exclude(~mask_operator.foreground_bitmap(bboxes))
+        print(f'{len(bboxes)} tasks intersect with the mask foreground.')
+
+    if skip_completed:
+        completion_index = CompletionIndex(skip_completed, verbose=state['verbose'])
+        bboxes.exclude(completion_index.bitmap(bboxes))
+        print(f'{len(bboxes)} tasks are not completed yet.')
 
     if queue_name is not None:
-        queue = SQSQueue(queue_name)
+        queue = get_queue(queue_name)
         queue.send_message_list(bboxes)
     else:
         for bbox in bboxes:
@@ -204,9 +248,10 @@ def generate_tasks(layer_path, mip, roi_start, chunk_size,
 @click.option('--max-mip', '-x', type=click.IntRange(min=5, max=16), default=8, 
               help='maximum MIP level for masks.')
 @click.option('--queue-name', '-q',
-              type=str, default=None, help='sqs queue name.')
+              type=str, default=None,
+              help='sqs queue name or local queue path, such as sqlite:///tmp/tasks.db')
 @click.option('--visibility-timeout', '-t',
-              type=int, default=3600, help='visibility timeout of the AWS SQS queue.')
+              type=int, default=3600, help='visibility timeout of the task queue.')
 @click.option('--thumbnail/--no-thumbnail', default=True, help='create thumbnail or not.')
 @click.option('--encoding', '-e',
               type=click.Choice(['raw', 'jpeg', 'compressed_segmentation', 
@@ -216,11 +261,16 @@ def generate_tasks(layer_path, mip, roi_start, chunk_size,
               help='voxel size or resolution of mip 0 image.')
 @click.option('--overwrite-info/--no-overwrite-info', default=False,
               help='normally we should avoid overwriting info file to avoid errors.')
+@click.option('--order',
+              type=click.Choice(['zyx', 'morton', 'hilbert']), default='zyx',
+              help='task order. morton and hilbert follow space filling curves ' +
+              'to process neighboring chunks consecutively.')
 @generator
 def setup_env(volume_start, volume_stop, volume_size, layer_path, max_ram_size,
               output_patch_size, input_patch_size, channel_num, dtype, 
               output_patch_overlap, crop_chunk_margin, mip, thumbnail_mip, max_mip,
-              queue_name, visibility_timeout, thumbnail, encoding, voxel_size, overwrite_info):
+              queue_name, visibility_timeout, thumbnail, encoding, voxel_size, 
+              overwrite_info, order):
     """Prepare storage info files and produce tasks."""
     assert not (volume_stop is None and volume_size is None)
     if isinstance(volume_start, tuple):
@@ -381,14 +431,14 @@ def setup_env(volume_start, volume_stop, volume_size, layer_path, max_ram_size,
     # create bounding boxes and ingest to queue
     bboxes = create_bounding_boxes(output_chunk_size,
                                    roi_start=roi_start, roi_stop=roi_stop,
-                                   verbose=state['verbose'])
+                                   verbose=state['verbose'], order=order)
     print('total number of tasks: ', len(bboxes))
     
     if state['verbose'] > 1:
         print('bounding boxes: ', bboxes)
 
     if queue_name is not None and not state['dry_run']:
-        queue = SQSQueue(queue_name, visibility_timeout=visibility_timeout)
+        queue = get_queue(queue_name, visibility_timeout=visibility_timeout)
         queue.send_message_list(bboxes)
     else:
         for bbox in bboxes:
@@ -421,31 +471,67 @@ def cloud_watch(tasks, name, log_name):
 
 @main.command('fetch-task')
 @click.option('--queue-name', '-q',
-                type=str, default=None, help='sqs queue name')
+                type=str, default=None,
+                help='sqs queue name or local queue path, such as sqlite:///tmp/tasks.db')
 @click.option('--visibility-timeout', '-v',
     type=int, default=None, 
-    help='visibility timeout of sqs queue; default is using the timeout of the queue.')
+    help='visibility timeout of task queue; default is using the timeout of the queue.')
 @click.option('--retry-times', '-r',
               type=int, default=30,
               help='the times of retrying if the queue is empty.')
+@click.option('--fetch-batch-size', '-f',
+              type=click.IntRange(min=1, max=10), default=1,
+              help='number of tasks fetched in one request. ' +
+              'the tasks are buffered locally and processed one by one.')
+@click.option('--delete-batch-size', '-d',
+              type=click.IntRange(min=1, max=10), default=1,
+              help='number of tasks deleted in one request. ' +
+              'the deletion is deferred until the batch is full.')
+@click.option('--heartbeat-interval', '-b',
+              type=click.IntRange(min=1), default=None,
+              help='extend the visibility timeout of the task in processing every ' +
+              'interval (seconds) until it is deleted. With the heartbeat, ' +
+              'we can use a short visibility timeout safely. default is no heartbeat.')
+@click.option('--skip-completed',
+              type=str, default=None,
+              help='skip and delete the tasks completed in this volume. ' +
+              'the completed tasks are found from the log files in volume/log.')
 @generator
-def fetch_task(queue_name, visibility_timeout, retry_times):
+def fetch_task(queue_name, visibility_timeout, retry_times, 
+               fetch_batch_size, delete_batch_size, heartbeat_interval,
+               skip_completed):
     """Fetch task from queue."""
     # This operator is actually a generator,
     # it replaces old tasks to a completely new tasks and loop over it!
-    queue = SQSQueue(queue_name, 
-                     visibility_timeout=visibility_timeout,
-                     retry_times=retry_times)
-    for task_handle, bbox_str in queue:
-        print('get task: ', bbox_str)
-        bbox = Bbox.from_filename(bbox_str)
-        # record the task handle to delete after the processing
-        task = get_initial_task() 
-        task['queue'] = queue
-        task['task_handle'] = task_handle
-        task['bbox'] = bbox
-        task['log']['bbox'] = bbox.to_filename()
-        yield task
+    queue = get_queue(queue_name,
+                      visibility_timeout=visibility_timeout,
+                      retry_times=retry_times,
+                      max_number_of_messages=fetch_batch_size,
+                      delete_batch_size=delete_batch_size,
+                      heartbeat_interval=heartbeat_interval)
+    if skip_completed:
+        completion_index = CompletionIndex(skip_completed, verbose=state['verbose'])
+    else:
+        completion_index = None
+
+    try:
+        for task_handle, bbox_str in queue:
+            print('get task: ', bbox_str)
+            if completion_index is not None and bbox_str in completion_index:
+                print(yellow(f'the task was completed, delete it: {bbox_str}'))
+                queue.delete(task_handle)
+                continue
+            bbox = Bbox.from_filename(bbox_str)
+            # record the task handle to delete after the processing
+            task = get_initial_task() 
+            task['queue'] = queue
+            task['task_handle'] = task_handle
+            task['bbox'] = bbox
+            task['log']['bbox'] = bbox.to_filename()
+            yield task
+    finally:
+        # delete the deferred tasks and release the buffered tasks
+        queue.close()
 
 
 @main.command('agglomerate')
@@ -521,17 +607,24 @@ def create_chunk(tasks, name, size, dtype, voxel_offset, all_zero, output_chunk_
               help='read chunk from file, support .h5 and .tif')
 @click.option('--offset', type=int, nargs=3, callback=default_none,
               help='global offset of this chunk')
+@click.option('--expand-margin-size', '-e',
+              type=int, nargs=3, default=(0, 0, 0),
+              help='include surrounding regions of task bounding box.')
+@click.option('--memmap/--no-memmap', default=False,
+              help='map the uncompressed image rather than reading it to memory.')
 @click.option('--output-chunk-name', '-o', type=str, default='chunk',
               help='chunk name in the global state')
 @operator
 def read_tif(tasks, name: str, file_name: str, offset: tuple,
-             output_chunk_name: str):
-    """Read tiff files."""
+             expand_margin_size: tuple, memmap: bool, output_chunk_name: str):
+    """Read tiff files. 
+    Only the task bounding box will be read if there is one."""
     for task in tasks:
         start = time()
         assert output_chunk_name not in task
-        task[output_chunk_name] = Chunk.from_tif(file_name,
-                                                    global_offset=offset)
+        task[output_chunk_name] = Chunk.from_tif(
+            file_name, global_offset=offset,
+            bbox=_expand_task_bbox(task, expand_margin_size), memmap=memmap)
         task['log']['timer'][name] = time() - start
         yield task
 
@@ -556,19 +649,31 @@ def read_tif(tasks, name: str, file_name: str, offset: tuple,
               nargs=3,
               callback=default_none,
               help='global offset of this chunk')
+@click.option('--cutout-bbox', '-b',
+              type=str, default=None,
+              help='only read the zyx bounding box in global coordinate, ' +
+              'such as 0-64_0-512_0-512. The file name of chunk bounding box.')
+@click.option('--expand-margin-size', '-e',
+              type=int, nargs=3, default=(0, 0, 0),
+              help='include surrounding regions of task bounding box.')
 @click.option('--output-chunk-name', '-o',
               type=str, default='chunk',
               help='chunk name in the global state')
 @operator
 def read_h5(tasks, name: str, file_name: str, dataset_path: str, offset: tuple,
-            output_chunk_name: str):
-    """Read HDF5 files."""
+            cutout_bbox: str, expand_margin_size: tuple, output_chunk_name: str):
+    """Read HDF5 files. 
+    Only the cutout or task bounding box will be read if there is one."""
+    if cutout_bbox:
+        cutout_bbox = Bbox.from_filename(cutout_bbox)
+
     for task in tasks:
         start = time()
         assert output_chunk_name not in task
-        task[output_chunk_name] = Chunk.from_h5(file_name,
-                                                dataset_path=dataset_path,
-                                                global_offset=offset)
+        task[output_chunk_name] = Chunk.from_h5(
+            file_name, dataset_path=dataset_path, global_offset=offset,
+            bbox=cutout_bbox if cutout_bbox else 
+                _expand_task_bbox(task, expand_margin_size))
         task['log']['timer'][name] = time() - start
         yield task
 
@@ -582,13 +687,106 @@ def read_h5(tasks, name: str, file_name: str, dataset_path: str, offset: tuple,
               type=click.Path(dir_okay=False, resolve_path=True),
               required=True,
               help='file name of hdf5 file.')
+@click.option('--chunk-size', '-c',
+              type=int, nargs=3, default=None, callback=default_none,
+              help='zyx chunk size of the HDF5 dataset.')
+@click.option('--compression', '-p',
+              type=click.Choice(['gzip', 'lzf', 'blosc']), default=None,
+              help='compression of the HDF5 dataset. blosc requires hdf5plugin.')
 @operator
-def write_h5(tasks, name, input_chunk_name, file_name):
+def write_h5(tasks, name, input_chunk_name, file_name, chunk_size, compression):
     """Write chunk to HDF5 file."""
     for task in tasks:
         handle_task_skip(task, name)
         if not task['skip']:
-            task[input_chunk_name].to_h5(file_name)
+            task[input_chunk_name].to_h5(file_name, chunk_size=chunk_size,
+                                         compression=compression)
+        yield task
+
+
+@main.command('read-zarr')
+@click.option('--name', type=str, default='read-zarr', help='name of operator')
+@click.option('--file-name', '-f', type=str, required=True,
+              help='the zarr array directory. the path ending with .n5 is read as N5.')
+@click.option('--cutout-bbox', '-b',
+              type=str, default=None,
+              help='only read the zyx bounding box in global coordinate, ' +
+              'such as 0-64_0-512_0-512. The file name of chunk bounding box.')
+@click.option('--expand-margin-size', '-e',
+              type=int, nargs=3, default=(0, 0, 0),
+              help='include surrounding regions of task bounding box.')
+@click.option('--output-chunk-name', '-o',
+              type=str, default=DEFAULT_CHUNK_NAME, help='output chunk name')
+@operator
+def read_zarr(tasks, name, file_name, cutout_bbox, expand_margin_size, 
+              output_chunk_name):
+    """Read zarr or N5 array. 
+    Only the cutout or task bounding box will be read if there is one."""
+    if cutout_bbox:
+        cutout_bbox = Bbox.from_filename(cutout_bbox)
+
+    for task in tasks:
+        handle_task_skip(task, name)
+        if not task['skip']:
+            start = time()
+            task[output_chunk_name] = Chunk.from_zarr(
+                file_name, bbox=cutout_bbox if cutout_bbox else
+                    _expand_task_bbox(task, expand_margin_size))
+            task['log']['timer'][name] = time() - start
+        yield task
+
+
+@main.command('create-zarr')
+@click.option('--file-name', '-f', type=str, required=True,
+              help='the zarr array directory. the path ending with .n5 is created as N5.')
+@click.option('--volume-offset', '-t', type=int, nargs=3, required=True,
+              help='zyx offset of the whole array.')
+@click.option('--volume-size', '-s', type=int, nargs=3, required=True,
+              help='zyx size of the whole array.')
+@click.option('--chunk-size', '-c', type=int, nargs=3, required=True,
+              help='zyx size of storage chunks. the chunks written by tasks ' +
+              'should be aligned with it, such as the task stride.')
+@click.option('--dtype', '-d', 
+              type=click.Choice(['uint8', 'uint16', 'uint32', 'uint64', 
+                                 'float16', 'float32']), 
+              default='float32', help='data type of the array.')
+@click.option('--num-channels', '-n', type=int, default=None,
+              help='number of channels. the array is 3D in default.')
+@click.option('--compression', '-p',
+              type=click.Choice(['blosc', 'gzip', 'none']), default='blosc',
+              help='compression of storage chunks.')
+@operator
+def create_zarr(tasks, file_name, volume_offset, volume_size, chunk_size,
+                dtype, num_channels, compression):
+    """Create zarr or N5 array for write-zarr. 
+    Create it once before running the tasks in parallel. 
+    In a single pipeline, put it after the task generator."""
+    Chunk.create_zarr(file_name, volume_offset, volume_size, chunk_size,
+                      dtype=dtype, num_channels=num_channels,
+                      compression=None if compression == 'none' else compression)
+    for task in tasks:
+        yield task
+
+
+@main.command('write-zarr')
+@click.option('--name', type=str, default='write-zarr', help='name of operator')
+@click.option('--input-chunk-name', '-i',
+              type=str, default=DEFAULT_CHUNK_NAME, help='input chunk name')
+@click.option('--file-name', '-f', type=str, required=True,
+              help='the zarr array directory created by create-zarr.')
+@click.option('--num-threads', type=int, default=None,
+              help='number of threads for blosc compression.')
+@operator
+def write_zarr(tasks, name, input_chunk_name, file_name, num_threads):
+    """Write chunk to an existing zarr or N5 array. 
+    Multiple tasks could write to the same array if the chunks are aligned 
+    with the storage chunks."""
+    for task in tasks:
+        handle_task_skip(task, name)
+        if not task['skip']:
+            start = time()
+            task[input_chunk_name].to_zarr(file_name, num_threads=num_threads)
+            task['log']['timer'][name] = time() - start
         yield task
 
 
@@ -708,6 +906,9 @@ def delete_chunk(tasks, name, chunk_name):
               'or not, default is false')
 @click.option('--validate-mip', 
               type=int, default=None, help='validate chunk using higher mip level')
+@click.option('--validate-checksum/--no-validate-checksum',
+              default=False, help='validate the storage blocks using the checksum ' +
+              'sidecar files written by the save operator.')
 @click.option('--blackout-sections/--no-blackout-sections',
     default=False, help='blackout some sections. ' +
     'the section ids json file should named blackout_section_ids.json. default is False.')
@@ -715,9 +916,29 @@ def delete_chunk(tasks, name, chunk_name):
     type=str, default='chunk', help='Variable name to store the cutout to for later retrieval.'
     + 'Chunkflow operators by default operates on a variable named "chunk" but' +
     ' sometimes you may need to have a secondary volume to work on.')
+@click.option('--block-cache-size', '-c',
+              type=click.IntRange(min=0), default=0,
+              help='size (MB) of in-memory cache of storage blocks shared by the ' +
+              'cutout operators in this worker. The overlapping margins of ' +
+              'neighboring chunks will not be downloaded again. default is 0 without cache.')
+@click.option('--disk-cache', '-d',
+              type=str, default=None,
+              help='local directory to cache the downloaded files, ' +
+              'which could be shared by the processes in a node.')
+@click.option('--disk-cache-size',
+              type=click.IntRange(min=1), default=None,
+              help='maximum size (MB) of disk cache. The oldest files will be deleted.')
+@click.option('--parallel', '-p',
+              type=click.IntRange(min=1), default=1,
+              help='number of processes to download and decode the blocks. ' +
+              'Every process uses 20 threads to download.')
+@click.option('--green-threads/--no-green-threads',
+              default=True, help='use green threads or preemptive threads to download.')
 @operator
 def cutout(tasks, name, volume_path, mip, chunk_start, chunk_size, expand_margin_size,
-           fill_missing, validate_mip, blackout_sections, output_chunk_name):
+           fill_missing, validate_mip, blackout_sections, output_chunk_name,
+           block_cache_size, disk_cache, disk_cache_size, parallel, green_threads,
+           validate_checksum):
     """Cutout chunk from volume."""
     if mip is None:
         mip = state['mip']
@@ -730,7 +951,13 @@ def cutout(tasks, name, volume_path, mip, chunk_start, chunk_size, expand_margin
         validate_mip=validate_mip,
         blackout_sections=blackout_sections,
         dry_run=state['dry_run'],
-        name=name)
+        name=name,
+        block_cache_size=block_cache_size * 1024 * 1024,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size * 1024 * 1024 if disk_cache_size else None,
+        parallel=parallel,
+        green_threads=green_threads,
+        validate_checksum=validate_checksum)
 
     for task in tasks:
         handle_task_skip(task, name)
@@ -755,6 +982,11 @@ def cutout(tasks, name, volume_path, mip, chunk_start, chunk_size, expand_margin
             assert output_chunk_name not in task
             task[output_chunk_name] = state['operators'][name](bbox)
             task['log']['timer'][name] = time() - start
+            task['log'].setdefault('download', dict())[name] = \
+                state['operators'][name].download_stats
+            if block_cache_size:
+                task['log'].setdefault('block_cache', dict())[name] = \
+                    state['operators'][name].cache_stats
             task['cutout_volume_path'] = volume_path
         yield task
 
@@ -1102,9 +1334,18 @@ def inference(tasks, name, convnet_model, convnet_weight_path, input_patch_size,
               help='default is doing maskout. ' +
               'check all zero will return boolean result.')
 @click.option('--skip-to', type=str, default='save', help='skip to a operator')
+@click.option('--parallel', '-p',
+              type=click.IntRange(min=1), default=1,
+              help='number of processes to download and decode the mask blocks.')
+@click.option('--green-threads/--no-green-threads',
+              default=False, help='use green threads or preemptive threads to download.')
+@click.option('--preload/--no-preload',
+              default=False, help='download the whole mask volume once, and ' +
+              'cut out the mask of every task from memory.')
 @operator
 def mask(tasks, name, input_chunk_name, output_chunk_name, volume_path, 
-         mip, inverse, fill_missing, check_all_zero, skip_to):
+         mip, inverse, fill_missing, check_all_zero, skip_to, parallel, green_threads,
+         preload):
     """Mask the chunk. The mask could be in higher mip level and we
     will automatically upsample it to the same mip level with chunk.
     """
@@ -1115,7 +1356,10 @@ def mask(tasks, name, input_chunk_name, output_chunk_name, volume_path,
                                             fill_missing=fill_missing,
                                             check_all_zero=check_all_zero,
                                             verbose=state['verbose'],
-                                            name=name)
+                                            name=name,
+                                            parallel=parallel,
+                                            green_threads=green_threads,
+                                            preload=preload)
 
     for task in tasks:
         handle_task_skip(task, name)
@@ -1133,6 +1377,9 @@ def mask(tasks, name, input_chunk_name, output_chunk_name, volume_path,
             # Note that mask operation could be used several times,
             # this will only record the last masking operation
             task['log']['timer'][name] = time() - start
+            if state['operators'][name].download_stats:
+                task['log'].setdefault('download', dict())[name] = \
+                    state['operators'][name].download_stats
         yield task
 
 
@@ -1313,15 +1560,37 @@ def quantize(tasks, name, input_chunk_name, output_chunk_name):
 @click.option('--create-thumbnail/--no-create-thumbnail',
     default=False, help='create thumbnail or not. ' +
     'the thumbnail is a downsampled and quantized version of the chunk.')
+@click.option('--write-checksum/--no-write-checksum',
+    default=False, help='write checksum sidecar files of the storage blocks ' +
+    'for validation in cutout. It only works with lossless encoding.')
+@click.option('--skip-completed/--no-skip-completed',
+    default=False, help='do not save the chunk again if it was saved with log.')
+@click.option('--skip-zero/--no-skip-zero',
+    default=False, help='do not write the all zero blocks. ' +
+    'the volume should be read with fill missing.')
+@click.option('--downsample-stop-mip', type=int, default=None,
+    help='downsample the chunk and upload the mip levels until this stop mip. ' +
+    'the indexing follows python style and the last index is exclusive. ' +
+    'the downsampled chunk is reused to create thumbnail.')
+@click.option('--chunk-max-value', type=float, default=None,
+    help='the chunk value mapped to the maximum of volume integer data type, ' +
+    'such as 1 for affinity map. the default is the maximum of each chunk.')
 @operator
-def save(tasks, name, volume_path, input_chunk_name, upload_log, create_thumbnail):
+def save(tasks, name, volume_path, input_chunk_name, upload_log, create_thumbnail,
+         write_checksum, skip_completed, skip_zero, downsample_stop_mip,
+         chunk_max_value):
     """Save chunk to volume."""
     state['operators'][name] = SaveOperator(volume_path,
                                             state['mip'],
                                             upload_log=upload_log,
                                             create_thumbnail=create_thumbnail,
                                             verbose=state['verbose'],
-                                            name=name)
+                                            name=name,
+                                            write_checksum=write_checksum,
+                                            skip_completed=skip_completed,
+                                            skip_zero=skip_zero,
+                                            downsample_stop_mip=downsample_stop_mip,
+                                            chunk_max_value=chunk_max_value)
 
     for task in tasks:
         # we got a special case for handling skip
@@ -1,3 +1,4 @@
+from time import time
 from warnings import warn
 import numpy as np
 
@@ -8,6 +9,26 @@ from chunkflow.chunk import Chunk
 from .base import OperatorBase
 
 
+def _any_in_ranges(arr: np.ndarray, starts, stops, axis: int):
+    """
+    whether any element is true in every range [start, stop) along the axis.
+    The ranges could overlap.
+    """
+    length = arr.shape[axis]
+    stops = np.asarray(stops)
+    # the reduceat indices should be smaller than the length, so the last 
+    # element is added to the ranges to the end separately
+    indices = np.stack((starts, np.minimum(stops, length - 1)), axis=1).ravel()
+    ret = np.logical_or.reduceat(arr, indices, axis=axis)
+    ret = np.take(ret, np.arange(0, indices.size, 2), axis=axis)
+    to_end = (stops >= length)
+    if np.any(to_end):
+        selection = [slice(None)] * arr.ndim
+        selection[axis] = to_end
+        ret[tuple(selection)] |= np.take(arr, [length - 1], axis=axis)
+    return ret
+
+
 class MaskOperator(OperatorBase):
     def __init__(self,
                  volume_path: str,
@@ -17,7 +38,22 @@ class MaskOperator(OperatorBase):
                  fill_missing: bool = False,
                  check_all_zero=False,
                  verbose: int = 1,
-                 name: str = 'mask'):
+                 name: str = 'mask',
+                 parallel: int = 1,
+                 green_threads: bool = False,
+                 preload: bool = False):
+        """
+        Parameters
+        ------------
+        parallel:
+            the number of processes to download and decode the mask blocks.
+        green_threads:
+            use green threads rather than preemptive threads to download.
+        preload:
+            download the whole mask volume once in construction, and cut out
+            the mask of every task from memory. The mask in high mip level
+            is normally only a few MB.
+        """
         super().__init__(name=name, verbose=verbose)
 
         self.mask_mip = mask_mip
@@ -25,18 +61,53 @@ class MaskOperator(OperatorBase):
         self.inverse = inverse
         self.volume_path = volume_path
         self.check_all_zero = check_all_zero
+        # the download statistics of the last mask reading
+        self.download_stats = None
 
         self.mask_vol = CloudVolume(volume_path,
                                     bounded=False,
                                     fill_missing=fill_missing,
                                     progress=verbose,
-                                    parallel=1,
+                                    parallel=parallel,
+                                    green_threads=green_threads,
                                     mip=mask_mip)
 
         if verbose:
             print(f'build mask operator based on {volume_path} at mip {mask_mip}')
 
+        self.preloaded_mask = None
+        if preload:
+            self._preload()
+
+    def _preload(self):
+        """download the whole mask volume as a boolean array in zyx order."""
+        bounds = self.mask_vol.bounds
+        if self.verbose:
+            print(f'preload the whole mask in {bounds}')
+        mask = self.mask_vol[bounds.to_slices()]
+        mask = np.transpose(np.asarray(mask)[..., 0])
+        self.preloaded_mask = (mask != 0)
+        self.preloaded_offset = tuple(bounds.minpt[::-1])
+
+    def _cutout_preloaded_mask(self, slices):
+        """cutout the mask from memory. The region outside of the volume is zero."""
+        shape = tuple(s.stop - s.start for s in slices)
+        mask = np.zeros(shape, dtype=np.bool_)
+        src = []
+        dst = []
+        for s, o, n in zip(slices, self.preloaded_offset, 
+                           self.preloaded_mask.shape):
+            lo = max(s.start, o)
+            hi = min(s.stop, o + n)
+            if hi <= lo:
+                return mask
+            src.append(slice(lo - o, hi - o))
+            dst.append(slice(lo - s.start, hi - s.start))
+        mask[tuple(dst)] = self.preloaded_mask[tuple(src)]
+        return mask
+
     def __call__(self, x):
+        self.download_stats = None
         if self.check_all_zero:
             assert isinstance(x, Bbox)
             return self.is_all_zero(x)
@@ -44,25 +115,73 @@ class MaskOperator(OperatorBase):
             assert isinstance(x, Chunk)
             return self.maskout(x)
 
+    def foreground_bitmap(self, bboxes):
+        """
+        find the grid cells intersecting with the mask foreground.
+        The whole mask region is downloaded once, and the cells are 
+        reduced using logical or along every axis.
+
+        Parameters
+        ------------
+        bboxes:
+            the BoundingBoxes of a task grid in chunk mip level.
+
+        Returns
+        --------
+        a boolean array with the grid size. 
+        The cells with any foreground mask voxel are true.
+        """
+        xyfactor = 2**(self.mask_mip - self.chunk_mip)
+        factor = np.array((1, xyfactor, xyfactor))
+
+        # the start and stop of grid cells in each dimension
+        starts = [o + np.arange(g) * s for o, g, s in
+                  zip(bboxes.roi_start, bboxes.grid_size, bboxes.stride)]
+        # use floor of start and ceil of stop to include the partially 
+        # covered mask voxels
+        mask_starts = [s // f for s, f in zip(starts, factor)]
+        mask_stops = [-((-s - c) // f) for s, c, f in
+                      zip(starts, bboxes.chunk_size, factor)]
+
+        region_start = [s.min() for s in mask_starts]
+        region_stop = [s.max() for s in mask_stops]
+        mask_slices = tuple(slice(a, z) for a, z in zip(region_start, region_stop))
+        if self.preloaded_mask is not None:
+            mask = self._cutout_preloaded_mask(mask_slices)
+        else:
+            if self.verbose:
+                print(f'download the whole mask in {mask_slices}')
+            mask = self.mask_vol[mask_slices[::-1]]
+            mask = np.transpose(np.asarray(mask)[..., 0])
+        if self.inverse:
+            mask = (mask == 0)
+        else:
+            mask = (mask != 0)
+
+        # reduce the cells axis by axis, the array shrinks in every step
+        lo = [s - a for s, a in zip(mask_starts, region_start)]
+        hi = [s - a for s, a in zip(mask_stops, region_start)]
+        for axis in range(3):
+            mask = _any_in_ranges(mask, lo[axis], hi[axis], axis)
+        return mask
+
     def is_all_zero(self, bbox):
         mask_in_high_mip = self._read_mask_in_high_mip(bbox)
-        # To-Do: replace with np.array_equiv function
-        # return np.array_equiv(mask_in_high_mip, 0)
-        return np.alltrue(mask_in_high_mip == 0)
+        return not np.any(mask_in_high_mip)
 
     def maskout(self, chunk):
         if self.verbose:
             print('mask out chunk using {} in mip {}'.format(
                 self.volume_path, self.mask_mip))
         
-        if np.alltrue(chunk == 0):
+        if chunk.is_all_zero():
             warn("chunk is all black, return directly")
             return chunk
 
         chunk_bbox = Bbox.from_slices(chunk.slices[-3:])
         mask_in_high_mip = self._read_mask_in_high_mip(chunk_bbox)
 
-        if np.alltrue(mask_in_high_mip == 0):
+        if not np.any(mask_in_high_mip):
             warn('the mask is all black, mask all the voxels directly')
             np.multiply(chunk, 0, out=chunk)
             return chunk
@@ -72,29 +191,20 @@ class MaskOperator(OperatorBase):
 
         assert np.any(mask_in_high_mip)
 
-        # make it the same type with input
-        mask_in_high_mip = mask_in_high_mip.astype(chunk.dtype)
-        
         # upsampling factor in XY plane
-        #mask = np.zeros(chunk.shape[-3:], dtype=chunk.dtype)
         xyfactor = 2**(self.mask_mip - self.chunk_mip)
-        for offset in np.ndindex((xyfactor, xyfactor)):
-            chunk.array[..., 
-                        np.s_[offset[0]::xyfactor], 
-                        np.s_[offset[1]::xyfactor]] *= mask_in_high_mip
-        #    mask[:, 
-        #         np.s_[offset[0]::xyfactor], 
-        #         np.s_[offset[1]::xyfactor]] = mask_in_high_mip
-
-        #if chunk.ndim == mask.ndim:
-        #    np.multiply(chunk, mask, out=chunk)
-        #elif chunk.ndim == mask.ndim + 1:
-        #    for channel in range(chunk.shape[0]):
-        #        np.multiply(chunk[channel, :, :, :],
-        #                    mask,
-        #                    out=chunk[channel, :, :, :])
-        #else:
-        #    raise ValueError('invalid chunk or mask dimension.')
+        arr = chunk.array
+        if arr.flags.c_contiguous:
+            # split the y and x axis as (mask voxel, factor), so the mask
+            # could be broadcasted in one multiplication without upsampling
+            view = arr.reshape(arr.shape[:-2] + (
+                mask_in_high_mip.shape[-2], xyfactor,
+                mask_in_high_mip.shape[-1], xyfactor))
+            np.multiply(view, mask_in_high_mip[:, :, None, :, None], out=view)
+        else:
+            mask = np.repeat(np.repeat(mask_in_high_mip, xyfactor, axis=-2),
+                             xyfactor, axis=-1)
+            np.multiply(arr, mask, out=arr)
         return chunk
 
     def _read_mask_in_high_mip(self, chunk_bbox):
@@ -128,8 +238,21 @@ class MaskOperator(OperatorBase):
         
         mask_slices = (chunk_slices[-3], ) + mask_slices
         
+        if self.preloaded_mask is not None:
+            mask = self._cutout_preloaded_mask(mask_slices)
+            if self.inverse:
+                mask = (mask == 0)
+            return mask
+
         # the slices did not contain the channel dimension
+        start = time()
         mask = self.mask_vol[mask_slices[::-1]]
+        elapsed = time() - start
+        self.download_stats = {
+            'bytes': mask.nbytes,
+            'seconds': elapsed,
+            'MB/s': mask.nbytes / 1024 / 1024 / elapsed if elapsed > 0 else None
+        }
         # this is a cloudvolume VolumeCutout rather than a normal numpy array
         # which will make np.alltrue(mask_in_high_mip == 0) to be
         # VolumeCutout(False) rather than False, so we need to transform it 
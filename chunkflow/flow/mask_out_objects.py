@@ -93,7 +93,7 @@ class MaskOutObjectsOperator(OperatorBase):
         seg = seg.array
 
         seg = self._only_keep_selected(seg)
-        if np.alltrue(seg == 0):
+        if not np.any(seg):
             if self.verbose:
                 print('no segmentation id is selected!')
             return
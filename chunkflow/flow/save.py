@@ -4,15 +4,18 @@ import json
 import numpy as np
 
 from cloudvolume import CloudVolume
-from cloudvolume.lib import Vec, Bbox, yellow
+from cloudvolume.lib import Vec, Bbox, min2, yellow
 from cloudvolume.storage import Storage
+import tinybrain
 
-from chunkflow.lib.igneous.tasks import downsample_and_upload
+from chunkflow.lib.igneous import downsample_scales
+from chunkflow.lib.checksum import checksum_path, block_checksums, put_checksums
+from chunkflow.lib.completion_index import CompletionIndex
 from chunkflow.chunk import Chunk
+from chunkflow.chunk.affinity_map.base import quantize
 
 from .base import OperatorBase
-from chunkflow.lib.igneous.tasks import downsample_and_upload
-#from .downsample_upload import DownsampleUploadOperator
+from .downsample_upload import downsample_pyramid, upload_pyramid
 
 
 class SaveOperator(OperatorBase):
@@ -22,10 +25,43 @@ class SaveOperator(OperatorBase):
                  upload_log: bool = True,
                  create_thumbnail: bool = False,
                  verbose: bool = True,
-                 name: str = 'save'):
+                 name: str = 'save',
+                 write_checksum: bool = False,
+                 skip_completed: bool = False,
+                 skip_zero: bool = False,
+                 downsample_stop_mip: int = None,
+                 chunk_max_value: float = None):
+        """
+        Parameters
+        ------------
+        write_checksum:
+            write crc32 checksum sidecar files of the storage blocks fully 
+            inside the chunk. The cutout operator could validate the 
+            downloaded blocks with them. It only works with lossless encoding.
+        skip_completed:
+            do not save the chunk if its log file exists in the volume.
+        skip_zero:
+            do not write the all zero storage blocks. The existing all zero
+            blocks will be deleted. The volume should be read with 
+            fill_missing, and the background of masked out region will 
+            not be stored at all.
+        downsample_stop_mip:
+            also downsample the chunk and upload the mip levels from mip + 1
+            to this stop mip (exclusive). The pyramid is computed once and 
+            shared with the thumbnail. All the levels are uploaded concurrently.
+        chunk_max_value:
+            the chunk value mapped to the maximum of the volume integer 
+            data type in conversion, such as 1 for affinity map. All the 
+            chunks are scaled consistently. The default is the maximum of 
+            each chunk.
+        """
         super().__init__(name=name, verbose=verbose)
         
         self.upload_log = upload_log
+        self.write_checksum = write_checksum
+        self.skip_zero = skip_zero
+        self.downsample_stop_mip = downsample_stop_mip
+        self.chunk_max_value = chunk_max_value
         self.create_thumbnail = create_thumbnail
         self.mip = mip
         self.verbose = verbose
@@ -35,9 +71,21 @@ class SaveOperator(OperatorBase):
             log_path = os.path.join(volume_path, 'log')
             self.log_storage = Storage(log_path)
 
-    def create_chunk_with_zeros(self, bbox, num_channels, dtype):
+        if skip_completed:
+            self.completion_index = CompletionIndex(volume_path, verbose=verbose)
+        else:
+            self.completion_index = None
+
+    def create_chunk_with_zeros(self, bbox, num_channels=None, dtype=None):
         """Create a fake all zero chunk. 
-        this is used in skip some operation based on mask."""
+        this is used in skip some operation based on mask.
+        The channel number and data type are the same with the volume by default."""
+        if num_channels is None or dtype is None:
+            volume = CloudVolume(self.volume_path, mip=self.mip)
+            if num_channels is None:
+                num_channels = volume.num_channels
+            if dtype is None:
+                dtype = volume.dtype
         shape = (num_channels, *bbox.size3())
         arr = np.zeros(shape, dtype=dtype)
         chunk = Chunk(arr, global_offset=(0, *bbox.minpt))
@@ -45,6 +93,10 @@ class SaveOperator(OperatorBase):
 
     def __call__(self, chunk, log=None):
         assert isinstance(chunk, Chunk)
+        if self.completion_index is not None and chunk.bbox in self.completion_index:
+            print(yellow(f'the chunk was saved, skip it: {chunk.bbox.to_filename()}'))
+            return
+
         if self.verbose:
             print('save chunk.')
         
@@ -59,16 +111,21 @@ class SaveOperator(OperatorBase):
             mip=self.mip,
             cache=False,
             green_threads=True,
+            delete_black_uploads=self.skip_zero,
             progress=self.verbose)
 
         chunk = self._auto_convert_dtype(chunk, volume)
         
         # transpose czyx to xyzc order
+        # the all zero blocks are deleted rather than uploaded with skip_zero
         arr = np.transpose(chunk.array)
         volume[chunk.slices[::-1]] = arr
+
+        if self.write_checksum:
+            self._write_checksum(chunk, volume)
         
-        if self.create_thumbnail:
-            self._create_thumbnail(chunk)
+        if self.create_thumbnail or self.downsample_stop_mip:
+            self._upload_pyramid(chunk)
 
         # add timer for save operation itself
         if log:
@@ -76,20 +133,97 @@ class SaveOperator(OperatorBase):
 
         if self.upload_log:
             self._upload_log(log, chunk.bbox)
+            if self.completion_index is not None:
+                self.completion_index.mark(chunk.bbox)
 
     def _auto_convert_dtype(self, chunk, volume):
-        """convert the data type to fit volume datatype"""
-        if volume.dtype != chunk.dtype:
-            print(yellow(f'converting chunk data type {chunk.dtype} ' + 
-                         f'to volume data type: {volume.dtype}'))
-            # float_chunk = chunk.astype(np.float64)
-            # chunk = float_chunk / np.iinfo(chunk.dtype).max * np.iinfo(self.volume.dtype).max
-            chunk = chunk / chunk.array.max() * np.iinfo(volume.dtype).max
+        """
+        convert the data type to fit volume datatype. 
+        For integer volume, the chunk is scaled, rounded and clipped section 
+        by section into the output array, so the temporary array is only 
+        one section.
+        """
+        if volume.dtype == chunk.dtype:
+            return chunk
+        print(yellow(f'converting chunk data type {chunk.dtype} ' + 
+                     f'to volume data type: {volume.dtype}'))
+        if not np.issubdtype(volume.dtype, np.integer):
             return chunk.astype(volume.dtype)
+
+        iinfo = np.iinfo(volume.dtype)
+        if self.chunk_max_value is None:
+            chunk_max_value = chunk.max()
         else:
-            return chunk
+            chunk_max_value = self.chunk_max_value
+        scale = iinfo.max / chunk_max_value if chunk_max_value else 0
+
+        # single precision is not enough for large integers
+        buffer_dtype = np.result_type(chunk.dtype, np.float32)
+        if iinfo.bits > 16:
+            buffer_dtype = np.float64
+        # the maximum of 64 bit integers is rounded up to 2**64 in floating 
+        # point, and it would overflow in the cast
+        upper = np.dtype(buffer_dtype).type(iinfo.max)
+        if int(upper) > iinfo.max:
+            upper = np.nextafter(upper, 0)
+        section = np.empty(chunk.shape[-2:], dtype=buffer_dtype)
+        arr = np.empty(chunk.shape, dtype=volume.dtype)
+        for idx in np.ndindex(chunk.shape[:-2]):
+            np.multiply(chunk.array[idx], scale, out=section, 
+                        dtype=buffer_dtype)
+            np.rint(section, out=section)
+            np.clip(section, iinfo.min, upper, out=section)
+            arr[idx] = section
+        return type(chunk)(arr, global_offset=chunk.global_offset)
+
+    def _write_checksum(self, chunk, volume):
+        if volume.encoding in ('jpeg', 'kempressed'):
+            print(yellow(f'can not write checksum for lossy encoding: {volume.encoding}'))
+            return
+        checksums = block_checksums(chunk.array, chunk.global_offset,
+                                    block_size=volume.underlying[::-1],
+                                    voxel_offset=volume.voxel_offset[::-1])
+        if self.verbose:
+            print(f'write checksum of {len(checksums)} blocks.')
+        put_checksums(checksum_path(self.volume_path, volume.key), checksums)
+
+    def _upload_pyramid(self, chunk):
+        """downsample the chunk once and upload all the mip levels and thumbnail."""
+        levels = []
+        pyramid = []
+        if self.downsample_stop_mip:
+            if self.verbose:
+                print(f'downsample to mip {self.downsample_stop_mip}...')
+            pyramid = downsample_pyramid(chunk, self.downsample_stop_mip - self.mip - 1)
+            for mip in range(self.mip + 1, self.downsample_stop_mip):
+                volume = CloudVolume(
+                    self.volume_path,
+                    fill_missing=True,
+                    bounded=False,
+                    autocrop=True,
+                    mip=mip,
+                    cache=False,
+                    green_threads=True,
+                    delete_black_uploads=self.skip_zero,
+                    progress=self.verbose)
+                levels.append((volume, pyramid[mip - self.mip - 1], mip - self.mip))
+
+        if self.create_thumbnail:
+            thumbnail_level = self._create_thumbnail(chunk, pyramid)
+            if thumbnail_level:
+                levels.append(thumbnail_level)
+
+        upload_pyramid(levels, chunk.global_offset)
 
-    def _create_thumbnail(self, chunk):
+    def _create_thumbnail(self, chunk, pyramid):
+        """
+        the thumbnail is the quantized last channel in the last mip level.
+        It reuses the downsampled pyramid if possible.
+
+        Returns
+        --------
+        the thumbnail volume, xyz array and the number of downsampling.
+        """
         if self.verbose:
             print('creating thumbnail...')
 
@@ -105,26 +239,41 @@ class SaveOperator(OperatorBase):
             green_threads=True,
             progress=self.verbose)
 
+        num_mips = self._thumbnail_num_mips(thumbnail_volume, chunk.shape[-3:][::-1])
+        if num_mips < 1:
+            print(yellow(f'no thumbnail mip level for chunk size {chunk.shape}'))
+            return None
+        thumbnail_volume.mip = self.mip + num_mips
+
         # only use the last channel, it is the Z affinity
         # if this is affinitymap
-        image = chunk[-1, :, :, :]
+        averaged = np.issubdtype(chunk.dtype, np.floating) or chunk.dtype == np.uint8
+        if averaged and len(pyramid) >= num_mips:
+            image = pyramid[num_mips - 1][..., -1]
+        else:
+            image = chunk.array[-1, ...] if chunk.ndim == 4 else chunk.array
+            # transpose to xyz
+            image = np.transpose(image)
+            image = tinybrain.downsample_with_averaging(
+                image, factor=(2, 2, 1), num_mips=num_mips)[-1]
         if np.issubdtype(image.dtype, np.floating):
-            image = (image * 255).astype(np.uint8)
-        
-        #self.thumbnail_operator(image)
-        # transpose to xyzc
-        image = np.transpose(image)
-        image_bbox = Bbox.from_slices(chunk.slices[::-1][:3])
-
-        downsample_and_upload(image,
-                              image_bbox,
-                              thumbnail_volume,
-                              Vec(*(image.shape)),
-                              mip=self.mip,
-                              max_mip=6,
-                              axis='z',
-                              skip_first=True,
-                              only_last_mip=True)
+            image = quantize(image)
+        return thumbnail_volume, image, num_mips
+
+    def _thumbnail_num_mips(self, thumbnail_volume, size, max_mip=6):
+        """the number of downsampling until the underlying chunk size."""
+        ds_shape = min2(thumbnail_volume.volume_size, Vec(*size))
+        # sometimes we downsample a base layer of 512x512
+        # into underlying chunks of 64x64 which permits more scales
+        underlying_mip = (self.mip + 1) if (self.mip + 1) in \
+            thumbnail_volume.available_mips else self.mip
+        underlying_shape = thumbnail_volume.mip_underlying(
+            underlying_mip).astype(np.float32)
+        underlying_shape[2] = float('inf')
+        fullscales = downsample_scales.compute_plane_downsampling_scales(
+            size=ds_shape, preserve_axis='z',
+            max_downsampled_size=int(min(*underlying_shape)))
+        return min(len(fullscales), max_mip - self.mip) - 1
 
     def _upload_log(self, log, output_bbox):
         assert log
@@ -1,11 +1,16 @@
 import os
 import boto3
 import hashlib
-from time import sleep
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import sleep, time
+from warnings import warn
 from cloudvolume.secrets import aws_credentials
 from cloudvolume.lib import Bbox
 from tqdm import tqdm
 
+from chunkflow.lib.heartbeat import Heartbeat
+
 class SQSQueue(object):
     """upload/fetch messages using AWS Simple Queue Services."""
     def __init__(self,
@@ -13,7 +18,10 @@ class SQSQueue(object):
                  visibility_timeout: int = 3600,
                  wait_if_empty: int = 100,
                  fetch_wait_time_seconds: int = 20,
-                 retry_times: int = 30):
+                 retry_times: int = 30,
+                 max_number_of_messages: int = 1,
+                 delete_batch_size: int = 1,
+                 heartbeat_interval: int = None):
         """
         Parameters
         ------------
@@ -28,7 +36,26 @@ class SQSQueue(object):
             to the fact that the message in queue is managed distributedly, and the query was
             only sent to a few servers. Normally, we should set fetch wait time to use long poll. 
             checkout the AWS `documentation <https://docs.aws.amazon.com/AWSSimpleQueueService/latest/SQSDeveloperGuide/sqs-long-polling.html#sqs-short-long-polling-differences>`_
+        max_number_of_messages:
+            the number of messages fetched in one request. The maximum value is 10.
+            The messages are buffered locally and handed out one by one.
+            A buffered message will be released back to the queue if more than 
+            half of the visibility timeout passed before it was handed out.
+        delete_batch_size:
+            the number of deleted messages sent in one request. The maximum value is 10.
+            The deletion is deferred until the batch is full or the queue needs to
+            fetch new messages. Note that the deferred deletion will be lost if 
+            the worker crashed, and the tasks will be processed again.
+        heartbeat_interval:
+            extend the visibility timeout of the messages in processing every 
+            interval (seconds) in a background thread until they are deleted.
+            With the heartbeat, we can use a short visibility timeout and a task 
+            of crashed worker will be visible again quickly. The interval should 
+            be smaller than the visibility timeout. The default is None without 
+            heartbeat.
         """
+        assert 1 <= max_number_of_messages <= 10
+        assert 1 <= delete_batch_size <= 10
         credentials = aws_credentials()
         self.client = boto3.client(
             'sqs',
@@ -56,6 +83,19 @@ class SQSQueue(object):
         self.wait_if_empty = wait_if_empty
         self.fetch_wait_time_seconds = fetch_wait_time_seconds
         self.retry_times = retry_times
+        self.max_number_of_messages = max_number_of_messages
+        self.delete_batch_size = delete_batch_size
+
+        # buffered messages of (receive time, receipt handle, body)
+        self._message_buffer = deque()
+        # receipt handles waiting for batch deletion
+        self._deleting_receipt_handles = []
+        self._queue_visibility_timeout = None
+
+        if heartbeat_interval:
+            self._heartbeat = Heartbeat(heartbeat_interval, self._extend_lease)
+        else:
+            self._heartbeat = None
     
     def _exist(self, queue_name):
         resp = self.client.list_queues(QueueNamePrefix=queue_name)
@@ -72,7 +112,7 @@ class SQSQueue(object):
         if self.visibility_timeout:
             resp = self.client.receive_message(
                 QueueUrl=self.queue_url,
-                MaxNumberOfMessages=1,
+                MaxNumberOfMessages=self.max_number_of_messages,
                 MessageAttributeNames=['All'],
                 VisibilityTimeout=self.visibility_timeout,
                 # we should set this wait time to use long poll
@@ -83,29 +123,109 @@ class SQSQueue(object):
             # use the visibility timeout in the queue
             resp = self.client.receive_message(
                 QueueUrl=self.queue_url,
-                MaxNumberOfMessages=1,
+                MaxNumberOfMessages=self.max_number_of_messages,
                 MessageAttributeNames=['All'],
                 WaitTimeSeconds=self.fetch_wait_time_seconds)
         return resp
 
-    def _check_md5(self, resp):
-        body = resp['Messages'][0]['Body']
-        md5_of_body = resp['Messages'][0]['MD5OfBody']
-        assert md5_of_body == hashlib.md5(body.encode('utf-8')).hexdigest()
+    def _check_md5(self, message):
+        body = message['Body']
+        md5_of_body = message['MD5OfBody']
         assert body is not None
+        assert md5_of_body == hashlib.md5(body.encode('utf-8')).hexdigest()
 
     @property
-    def handle_and_message(self):
-        resp = self._receive_message()
-        self._check_md5(resp)
-        receipt_handle = resp['Messages'][0]['ReceiptHandle']
-        assert isinstance(receipt_handle, str)
-        body = resp['Messages'][0]['Body']
-        return receipt_handle, body
+    def _lease_time(self):
+        """the visibility timeout applied to the received messages."""
+        if self.visibility_timeout:
+            return self.visibility_timeout
 
-    def __next__(self):
+        if self._queue_visibility_timeout is None:
+            resp = self.client.get_queue_attributes(
+                QueueUrl=self.queue_url, AttributeNames=['VisibilityTimeout'])
+            self._queue_visibility_timeout = int(
+                resp['Attributes']['VisibilityTimeout'])
+        return self._queue_visibility_timeout
+
+    def _fetch_messages(self):
+        """fetch a batch of messages and put them in the buffer.
+        
+        Returns
+        --------
+        the number of fetched messages.
+        """
+        # this is a good time to clear the deferred deletion
+        # since we need a round trip anyway
+        self.flush()
+
+        receive_time = time()
         resp = self._receive_message()
         if 'Messages' not in resp:
+            return 0
+
+        for message in resp['Messages']:
+            self._check_md5(message)
+            receipt_handle = message['ReceiptHandle']
+            assert isinstance(receipt_handle, str)
+            self._message_buffer.append(
+                (receive_time, receipt_handle, message['Body']))
+        return len(resp['Messages'])
+
+    def _pop_message(self):
+        """hand out a buffered message with enough lease time left.
+
+        Returns
+        --------
+        receipt handle and message body. None if the buffer is empty.
+        """
+        expired_receipt_handles = []
+        message = None
+        while self._message_buffer:
+            receive_time, receipt_handle, body = self._message_buffer.popleft()
+            if self.max_number_of_messages == 1 or \
+                    time() - receive_time < self._lease_time / 2:
+                message = (receipt_handle, body)
+                if self._heartbeat:
+                    self._heartbeat.add(receipt_handle)
+                break
+            else:
+                expired_receipt_handles.append(receipt_handle)
+
+        if expired_receipt_handles:
+            print(f'release {len(expired_receipt_handles)} buffered messages ' +
+                  'since their visibility timeout is going to expire.')
+            self._change_visibility_timeout(expired_receipt_handles, 0)
+        return message
+
+    def _change_visibility_timeout(self, receipt_handles: list, 
+                                   visibility_timeout: int):
+        for idx in range(0, len(receipt_handles), 10):
+            entries = [{'Id': str(i), 'ReceiptHandle': handle, 
+                        'VisibilityTimeout': visibility_timeout} 
+                       for i, handle in enumerate(receipt_handles[idx:idx+10])]
+            resp = self.client.change_message_visibility_batch(
+                QueueUrl=self.queue_url, Entries=entries)
+            if 'Failed' in resp:
+                warn(f'failed to change visibility timeout: {resp["Failed"]}')
+
+    def _extend_lease(self, receipt_handles: list):
+        self._change_visibility_timeout(receipt_handles, self._lease_time)
+
+    @property
+    def handle_and_message(self):
+        message = self._pop_message()
+        if message is None:
+            self._fetch_messages()
+            message = self._pop_message()
+        assert message is not None
+        return message
+
+    def __next__(self):
+        message = self._pop_message()
+        if message is not None:
+            return message
+
+        if self._fetch_messages() == 0:
             # the queue is empty
             if self.wait_if_empty and self.retry_times > 0:
                 # the 20 seconds additional waiting time is from the receiving
@@ -118,13 +238,10 @@ class SQSQueue(object):
                 # contine trying to receive message
                 return self.__next__()
             else:
+                self.close()
                 raise StopIteration
         else:
-            self._check_md5(resp)
-            receipt_handle = resp['Messages'][0]['ReceiptHandle']
-            assert isinstance(receipt_handle, str)
-            body = resp['Messages'][0]['Body']
-            return receipt_handle, body
+            return self.__next__()
 
     def delete(self, receipt_handle: str):
         """
@@ -133,8 +250,42 @@ class SQSQueue(object):
         receipt_handle:
             a random string as a handle of the message in queue.
         """
-        self.client.delete_message(QueueUrl=self.queue_url,
-                                   ReceiptHandle=receipt_handle)
+        if self.delete_batch_size == 1:
+            self.client.delete_message(QueueUrl=self.queue_url,
+                                       ReceiptHandle=receipt_handle)
+            if self._heartbeat:
+                self._heartbeat.discard(receipt_handle)
+        else:
+            self._deleting_receipt_handles.append(receipt_handle)
+            if len(self._deleting_receipt_handles) >= self.delete_batch_size:
+                self.flush()
+
+    def flush(self):
+        """delete the messages waiting for batch deletion."""
+        receipt_handles = self._deleting_receipt_handles
+        while receipt_handles:
+            entries = [{'Id': str(i), 'ReceiptHandle': handle}
+                       for i, handle in enumerate(receipt_handles[:10])]
+            resp = self.client.delete_message_batch(
+                QueueUrl=self.queue_url, Entries=entries)
+            if 'Failed' in resp:
+                # the visibility timeout of these messages expired and
+                # they might be processed again by other workers.
+                warn(f'failed to delete messages: {resp["Failed"]}')
+            if self._heartbeat:
+                for handle in receipt_handles[:10]:
+                    self._heartbeat.discard(handle)
+            del receipt_handles[:10]
+
+    def close(self):
+        """delete the deferred messages and release the buffered messages."""
+        self.flush()
+        if self._heartbeat:
+            self._heartbeat.stop()
+        if self._message_buffer:
+            receipt_handles = [m[1] for m in self._message_buffer]
+            self._message_buffer.clear()
+            self._change_visibility_timeout(receipt_handles, 0)
 
     def send_message(self, message: str):
         self.client.send_message(
@@ -142,39 +293,80 @@ class SQSQueue(object):
             MessageBody=message
         )
 
-    def _send_entry_list(self, entry_list: list):
-        resp = self.client.send_message_batch(QueueUrl=self.queue_url,
-                                              Entries=entry_list)
-        # the failed list should be empty
-        assert 'Failed' not in resp
-        entry_list.clear()
+    def _send_entry_list(self, entry_list: list, retry_times: int = 5):
+        """send a batch of entries and retry the failed ones with backoff.
 
-    def send_message_list(self, message_list: list):
+        The client of boto3 is thread safe, so this could run in threads.
+        """
+        for retry in range(retry_times + 1):
+            if retry > 0:
+                sleep(min(2 ** retry * 0.1, 10))
+            try:
+                resp = self.client.send_message_batch(QueueUrl=self.queue_url,
+                                                      Entries=entry_list)
+            except Exception as err:
+                warn(f'failed to send message batch: {err}')
+                continue
+
+            if 'Failed' not in resp or not resp['Failed']:
+                return
+            # only retry the failed entries
+            failed_ids = set(failed['Id'] for failed in resp['Failed'])
+            entry_list = [e for e in entry_list if e['Id'] in failed_ids]
+
+        raise RuntimeError(f'failed to send {len(entry_list)} messages ' +
+                           f'after retrying {retry_times} times.')
+
+    def send_message_list(self, message_list, num_threads: int = 8):
         '''
         Use batch mode to send a bunch of messages quickly.
 
         Parameters
         -----------
         message_list: 
-            a list of input messages. the messages are string.
+            an iterable of input messages. the messages are string or Bbox.
+            It could be a generator, and the messages are consumed in streaming.
+        num_threads:
+            the number of batches sent concurrently.
         '''
-        # the maximum number in a batch is 10
-        task_entries = []
-        for mid, message in tqdm(enumerate(message_list), 
-                                 desc='sending messages to sqs queue: '):
-            if isinstance(message, Bbox):
-                message = message.to_filename()
-
-            entry = {'Id': str(mid), 'MessageBody': message}
-            task_entries.append(entry)
-
-            # use batch mode to produce tasks
-            if len(task_entries) == 10:
-                self._send_entry_list(task_entries)
-
-        # send the remaining tasks less than 10
-        if task_entries:
-            self._send_entry_list(task_entries)
-
-        # make sure that the remaining task list is empty
-        assert not task_entries
+        if hasattr(message_list, '__len__'):
+            total = len(message_list)
+        else:
+            total = None
+
+        # the number of pending batches is bounded to limit memory usage
+        max_pending = 2 * num_threads
+        pending = set()
+        with ThreadPoolExecutor(max_workers=num_threads) as executor, \
+                tqdm(total=total, desc='sending messages to sqs queue: ') as pbar:
+
+            def _submit(entries):
+                future = executor.submit(self._send_entry_list, entries)
+                future.add_done_callback(lambda f: pbar.update(len(entries)))
+                pending.add(future)
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        pending.remove(finished)
+                        # raise the error if there is any
+                        finished.result()
+
+            # the maximum number in a batch is 10
+            task_entries = []
+            for message in message_list:
+                if isinstance(message, Bbox):
+                    message = message.to_filename()
+
+                # the id only needs to be unique in a batch
+                task_entries.append({'Id': str(len(task_entries)),
+                                     'MessageBody': message})
+                if len(task_entries) == 10:
+                    _submit(task_entries)
+                    task_entries = []
+
+            # send the remaining tasks less than 10
+            if task_entries:
+                _submit(task_entries)
+
+            for future in pending:
+                future.result()
@@ -0,0 +1,172 @@
+import os
+import threading
+from collections import OrderedDict
+from itertools import product
+
+import numpy as np
+
+
+class BlockCache(object):
+    """bounded in-memory LRU cache of decoded storage blocks of a volume.
+
+    The blocks are aligned with the storage chunks, so the overlapping
+    regions of neighboring cutouts are only downloaded once.
+    The block arrays are in the order of (channel, z, y, x).
+    """
+    def __init__(self, block_size: tuple, voxel_offset: tuple, max_bytes: int):
+        """
+        Parameters
+        ------------
+        block_size:
+            (z, y, x) size of storage blocks.
+        voxel_offset:
+            (z, y, x) offset of the block grid.
+        max_bytes:
+            the maximum number of bytes of the cached blocks.
+            The least recently used blocks will be evicted.
+        """
+        self.block_size = tuple(int(b) for b in block_size)
+        self.voxel_offset = tuple(int(o) for o in voxel_offset)
+        self.max_bytes = max_bytes
+
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.downloaded_bytes = 0
+
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def _block_start(self, idx: tuple):
+        return tuple(o + i * b for o, i, b in
+                     zip(self.voxel_offset, idx, self.block_size))
+
+    def _put(self, idx: tuple, block: np.ndarray):
+        with self._lock:
+            if idx in self._blocks:
+                self.nbytes -= self._blocks.pop(idx).nbytes
+            self._blocks[idx] = block
+            self.nbytes += block.nbytes
+            while self.nbytes > self.max_bytes and self._blocks:
+                _, evicted = self._blocks.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def cutout(self, slices: tuple, fetch):
+        """
+        Parameters
+        ------------
+        slices:
+            (z, y, x) slices of the requested region.
+        fetch:
+            a callable taking (z, y, x) slices and returning the array
+            in the order of (channel, z, y, x). All the missing blocks are
+            fetched in one call with their bounding box.
+
+        Returns
+        --------
+        array in the order of (channel, z, y, x).
+        """
+        start = tuple((s.start - o) // b for s, o, b in
+                      zip(slices, self.voxel_offset, self.block_size))
+        stop = tuple(-((o - s.stop) // b) for s, o, b in
+                     zip(slices, self.voxel_offset, self.block_size))
+        indices = list(product(*[range(a, z) for a, z in zip(start, stop)]))
+
+        blocks = dict()
+        with self._lock:
+            for idx in indices:
+                block = self._blocks.get(idx)
+                if block is not None:
+                    self._blocks.move_to_end(idx)
+                    blocks[idx] = block
+        missing = [idx for idx in indices if idx not in blocks]
+        self.hits += len(indices) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # the missing blocks are normally a slab along one side,
+            # fetch their bounding box in one request.
+            missing_start = np.min(missing, axis=0)
+            missing_stop = np.max(missing, axis=0) + 1
+            fetch_start = self._block_start(missing_start)
+            fetch_slices = tuple(slice(s, s + (z - a) * b) for s, a, z, b in
+                zip(fetch_start, missing_start, missing_stop, self.block_size))
+            array = fetch(fetch_slices)
+            self.downloaded_bytes += array.nbytes
+
+            for idx in product(*[range(a, z) for a, z in
+                                 zip(missing_start, missing_stop)]):
+                local_slices = tuple(slice((i - a) * b, (i - a + 1) * b) for
+                    i, a, b in zip(idx, missing_start, self.block_size))
+                # copy the block, so the fetched array could be released
+                block = np.array(array[(slice(None), ) + local_slices])
+                blocks[idx] = block
+                self._put(idx, block)
+
+        # assemble the requested region from the blocks
+        some_block = next(iter(blocks.values()))
+        shape = tuple(s.stop - s.start for s in slices)
+        out = np.empty((some_block.shape[0], ) + shape, dtype=some_block.dtype)
+        for idx in indices:
+            block_start = self._block_start(idx)
+            out_slices = []
+            block_slices = []
+            for s, bs, b in zip(slices, block_start, self.block_size):
+                lo = max(s.start, bs)
+                hi = min(s.stop, bs + b)
+                out_slices.append(slice(lo - s.start, hi - s.start))
+                block_slices.append(slice(lo - bs, hi - bs))
+            out[(slice(None), ) + tuple(out_slices)] = \
+                blocks[idx][(slice(None), ) + tuple(block_slices)]
+        return out
+
+
+# the block caches shared by all the operators in a worker process
+_block_caches = dict()
+
+
+def get_block_cache(volume_path: str, mip: int, block_size: tuple,
+                    voxel_offset: tuple, max_bytes: int):
+    """get the shared block cache of a volume."""
+    key = (volume_path, mip)
+    if key not in _block_caches:
+        _block_caches[key] = BlockCache(block_size, voxel_offset, max_bytes)
+    block_cache = _block_caches[key]
+    block_cache.max_bytes = max(block_cache.max_bytes, max_bytes)
+    return block_cache
+
+
+def prune_disk_cache(cache_path: str, max_bytes: int):
+    """delete the oldest files until the cache size is within the limit.
+
+    The files are normally created by CloudVolume with caching.
+    """
+    files = []
+    total_bytes = 0
+    for root, _, file_names in os.walk(cache_path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                # deleted by another process
+                continue
+            files.append((stat.st_mtime, stat.st_size, file_path))
+            total_bytes += stat.st_size
+
+    if total_bytes <= max_bytes:
+        return 0
+
+    deleted_bytes = 0
+    for _, size, file_path in sorted(files):
+        if total_bytes - deleted_bytes <= max_bytes:
+            break
+        try:
+            os.remove(file_path)
+            deleted_bytes += size
+        except FileNotFoundError:
+            continue
+    return deleted_bytes
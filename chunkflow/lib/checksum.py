@@ -0,0 +1,88 @@
+import os
+import zlib
+from itertools import product
+
+import numpy as np
+
+from cloudvolume.lib import Bbox
+from cloudvolume.storage import Storage
+
+
+def checksum_path(volume_path: str, key: str):
+    """the directory of checksum sidecar files of a mip level.
+
+    Parameters
+    ------------
+    volume_path:
+        the path of volume.
+    key:
+        the key of mip level in the info file, such as `4_4_40`.
+    """
+    return os.path.join(volume_path, 'checksum', key)
+
+
+def block_checksums(array: np.ndarray, global_offset: tuple,
+                    block_size: tuple, voxel_offset: tuple):
+    """crc32 checksums of the storage blocks fully inside the array.
+
+    The partially covered blocks are ignored since they could be written
+    by multiple tasks.
+
+    Parameters
+    ------------
+    array:
+        3D (z, y, x) or 4D (channel, z, y, x) array.
+    global_offset:
+        the offset of the array. The channel offset is ignored.
+    block_size:
+        (z, y, x) size of storage blocks.
+    voxel_offset:
+        (z, y, x) offset of the block grid.
+
+    Returns
+    --------
+    dict of block bounding box file name and checksum.
+    """
+    if array.ndim == 3:
+        array = np.expand_dims(array, axis=0)
+    global_offset = global_offset[-3:]
+
+    start = tuple(-((o - g) // b) for g, o, b in
+                  zip(global_offset, voxel_offset, block_size))
+    stop = tuple((g + s - o) // b for g, s, o, b in
+                 zip(global_offset, array.shape[-3:], voxel_offset, block_size))
+
+    checksums = dict()
+    for idx in product(*[range(a, z) for a, z in zip(start, stop)]):
+        block_start = tuple(o + i * b for o, i, b in
+                            zip(voxel_offset, idx, block_size))
+        local_slices = tuple(slice(s - g, s - g + b) for s, g, b in
+                             zip(block_start, global_offset, block_size))
+        block = np.ascontiguousarray(array[(slice(None), ) + local_slices])
+        bbox = Bbox.from_delta(block_start, block_size)
+        checksums[bbox.to_filename()] = '{:08x}'.format(zlib.crc32(block))
+    return checksums
+
+
+def put_checksums(path: str, checksums: dict):
+    """upload the checksum sidecar files."""
+    with Storage(path) as stor:
+        stor.put_files(list(checksums.items()), content_type='text/plain')
+
+
+def get_checksums(path: str, file_names: list):
+    """download the checksum sidecar files.
+
+    Returns
+    --------
+    dict of block bounding box file name and checksum.
+    The blocks without sidecar file are not included.
+    """
+    with Storage(path) as stor:
+        results = stor.get_files(file_names)
+
+    checksums = dict()
+    for result in results:
+        if result['error'] is None and result['content'] is not None:
+            checksums[result['filename']] = result['content'].decode('utf-8')
+    return checksums
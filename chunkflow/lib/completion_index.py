@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+
+from cloudvolume.lib import Bbox
+from cloudvolume.storage import Storage
+
+
+def _task_name(bbox):
+    """the zyx bounding box file name without channel dimension.
+
+    Returns
+    --------
+    None if the file name is not a bounding box.
+    """
+    if isinstance(bbox, str):
+        try:
+            bbox = Bbox.from_filename(bbox)
+        except Exception:
+            return None
+    if len(bbox.minpt) > 3:
+        bbox = Bbox(bbox.minpt[-3:], bbox.maxpt[-3:])
+    return bbox.to_filename()
+
+
+class CompletionIndex(object):
+    """the index of completed tasks built from the log files.
+
+    The save operator uploads a log file named by the bounding box to
+    `<volume>/log/` after the chunk was saved, so a task with log file
+    was completed.
+    """
+    def __init__(self, volume_path: str, verbose: bool = True):
+        """
+        Parameters
+        ------------
+        volume_path:
+            the path of the output volume with log files.
+        """
+        self.log_path = os.path.join(volume_path, 'log')
+        self.verbose = verbose
+        self._completed = set()
+        self.refresh()
+
+    def refresh(self):
+        """list the log files to update the completed tasks."""
+        with Storage(self.log_path) as stor:
+            for file_name in stor.list_files(flat=True):
+                if file_name.endswith('.json'):
+                    task_name = _task_name(file_name[:-len('.json')])
+                    if task_name is not None:
+                        self._completed.add(task_name)
+        if self.verbose:
+            print(f'found {len(self._completed)} completed tasks in {self.log_path}')
+
+    def __len__(self):
+        return len(self._completed)
+
+    def __contains__(self, bbox):
+        return _task_name(bbox) in self._completed
+
+    def mark(self, bbox):
+        """mark a task as completed incrementally."""
+        task_name = _task_name(bbox)
+        assert task_name is not None
+        self._completed.add(task_name)
+
+    def bitmap(self, bboxes):
+        """
+        Parameters
+        ------------
+        bboxes:
+            the BoundingBoxes of a task grid.
+
+        Returns
+        --------
+        a boolean array with the grid size. The completed grid cells are true.
+        """
+        bitmap = np.zeros(tuple(bboxes.grid_size), dtype=bool)
+        for task_name in self._completed:
+            idx = bboxes.grid_index(Bbox.from_filename(task_name))
+            if idx is not None:
+                bitmap[idx] = True
+        return bitmap
@@ -0,0 +1,62 @@
+import threading
+from warnings import warn
+
+
+class Heartbeat(object):
+    """periodically extend the lease of in-flight messages in a background thread.
+
+    The thread starts when the first message was added and keeps beating
+    until it was stopped.
+    """
+    def __init__(self, interval: float, extend_lease):
+        """
+        Parameters
+        ------------
+        interval:
+            the time interval between two beats (seconds).
+            It should be smaller than the visibility timeout.
+        extend_lease:
+            a callable taking a list of receipt handles to extend their lease.
+            It will be called in the background thread.
+        """
+        assert interval > 0
+        self.interval = interval
+        self.extend_lease = extend_lease
+
+        self._receipt_handles = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, receipt_handle: str):
+        with self._lock:
+            self._receipt_handles.add(receipt_handle)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='heartbeat')
+            self._thread.start()
+
+    def discard(self, receipt_handle: str):
+        with self._lock:
+            self._receipt_handles.discard(receipt_handle)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                receipt_handles = list(self._receipt_handles)
+            if not receipt_handles:
+                continue
+            try:
+                self.extend_lease(receipt_handles)
+            except Exception as err:
+                # a missed beat is not fatal, the next beat will try again
+                warn(f'failed to extend the lease of messages: {err}')
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop_event.clear()
+        with self._lock:
+            self._receipt_handles.clear()
@@ -0,0 +1,259 @@
+"""traverse a grid along space filling curves.
+
+The grid indices are ordered as (z, y, x) in the whole module.
+Consecutive indices along the curve are spatially close, so the neighboring
+chunks are processed around the same time.
+"""
+from itertools import product
+
+
+def grid_indices(grid_size: tuple, order: str = 'zyx'):
+    """iterate all the indices of a 3D grid.
+
+    Parameters
+    ------------
+    grid_size:
+        (z, y, x) number of grid cells in each dimension.
+    order:
+        zyx: x is the fastest changing dimension.
+        morton: Z order curve. The grid do not need to be a power of 2.
+        hilbert: generalized Hilbert curve for arbitrary cuboid.
+            Consecutive indices are face neighbors unless some dimension
+            has odd size.
+    """
+    grid_size = tuple(int(g) for g in grid_size)
+    assert len(grid_size) == 3
+    if any(g <= 0 for g in grid_size):
+        return iter(())
+
+    if order == 'zyx':
+        return product(*[range(g) for g in grid_size])
+    elif order == 'morton':
+        return _morton_order(grid_size)
+    elif order == 'hilbert':
+        return _hilbert_order(grid_size)
+    else:
+        raise ValueError(f'unsupported order: {order}')
+
+
+def _morton_order(grid_size: tuple):
+    # the enclosing power of 2 size for each dimension
+    block_size = tuple(1 << (g - 1).bit_length() for g in grid_size)
+
+    def _traverse(start, size):
+        # prune the blocks outside of grid
+        if any(s >= g for s, g in zip(start, grid_size)):
+            return
+        if size == (1, 1, 1):
+            yield start
+            return
+        # only split the dimensions that are not fully subdivided
+        half = tuple(max(s // 2, 1) for s in size)
+        offsets = [(0, h) if s > 1 else (0, ) for s, h in zip(size, half)]
+        for offset in product(*offsets):
+            yield from _traverse(
+                tuple(s + o for s, o in zip(start, offset)), half)
+
+    return _traverse((0, 0, 0), block_size)
+
+
+def _hilbert_order(grid_size: tuple):
+    nz, ny, nx = grid_size
+    if nz == 1:
+        return ((0, y, x) for x, y in _gilbert2d(nx, ny))
+    elif ny == 1:
+        return ((z, 0, x) for x, z in _gilbert2d(nx, nz))
+    elif nx == 1:
+        return ((z, y, 0) for y, z in _gilbert2d(ny, nz))
+    else:
+        return ((z, y, x) for x, y, z in _gilbert3d(nx, ny, nz))
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+def _gilbert2d(width: int, height: int):
+    """generalized Hilbert curve for arbitrary rectangle.
+
+    This is adapted from the `gilbert <https://github.com/jakubcerveny/gilbert>`_
+    implementation by Jakub Červený.
+    """
+    if width >= height:
+        yield from _generate2d(0, 0, width, 0, 0, height)
+    else:
+        yield from _generate2d(0, 0, 0, height, width, 0)
+
+
+def _generate2d(x, y, ax, ay, bx, by):
+    w = abs(ax + ay)
+    h = abs(bx + by)
+    # unit major direction
+    dax, day = _sign(ax), _sign(ay)
+    # unit orthogonal direction
+    dbx, dby = _sign(bx), _sign(by)
+
+    if h == 1:
+        for _ in range(w):
+            yield (x, y)
+            x, y = x + dax, y + day
+        return
+
+    if w == 1:
+        for _ in range(h):
+            yield (x, y)
+            x, y = x + dbx, y + dby
+        return
+
+    ax2, ay2 = ax // 2, ay // 2
+    bx2, by2 = bx // 2, by // 2
+    w2 = abs(ax2 + ay2)
+    h2 = abs(bx2 + by2)
+
+    if 2 * w > 3 * h:
+        # long case, split in two parts only
+        if (w2 % 2) and (w > 2):
+            # prefer even steps
+            ax2, ay2 = ax2 + dax, ay2 + day
+        yield from _generate2d(x, y, ax2, ay2, bx, by)
+        yield from _generate2d(x + ax2, y + ay2, ax - ax2, ay - ay2, bx, by)
+    else:
+        if (h2 % 2) and (h > 2):
+            # prefer even steps
+            bx2, by2 = bx2 + dbx, by2 + dby
+        # standard case, one step up, one long horizontal, one step down
+        yield from _generate2d(x, y, bx2, by2, ax2, ay2)
+        yield from _generate2d(x + bx2, y + by2, ax, ay, bx - bx2, by - by2)
+        yield from _generate2d(x + (ax - dax) + (bx2 - dbx),
+                               y + (ay - day) + (by2 - dby),
+                               -bx2, -by2, -(ax - ax2), -(ay - ay2))
+
+
+def _gilbert3d(width: int, height: int, depth: int):
+    """generalized Hilbert curve for arbitrary cuboid.
+
+    This is adapted from the `gilbert <https://github.com/jakubcerveny/gilbert>`_
+    implementation by Jakub Červený.
+    """
+    if width >= height and width >= depth:
+        yield from _generate3d(0, 0, 0, width, 0, 0, 0, height, 0, 0, 0, depth)
+    elif height >= width and height >= depth:
+        yield from _generate3d(0, 0, 0, 0, height, 0, width, 0, 0, 0, 0, depth)
+    else:
+        yield from _generate3d(0, 0, 0, 0, 0, depth, width, 0, 0, 0, height, 0)
+
+
+def _generate3d(x, y, z, ax, ay, az, bx, by, bz, cx, cy, cz):
+    w = abs(ax + ay + az)
+    h = abs(bx + by + bz)
+    d = abs(cx + cy + cz)
+
+    # unit major direction
+    dax, day, daz = _sign(ax), _sign(ay), _sign(az)
+    # unit orthogonal directions
+    dbx, dby, dbz = _sign(bx), _sign(by), _sign(bz)
+    dcx, dcy, dcz = _sign(cx), _sign(cy), _sign(cz)
+
+    # trivial row fills
+    if h == 1 and d == 1:
+        for _ in range(w):
+            yield (x, y, z)
+            x, y, z = x + dax, y + day, z + daz
+        return
+    if w == 1 and d == 1:
+        for _ in range(h):
+            yield (x, y, z)
+            x, y, z = x + dbx, y + dby, z + dbz
+        return
+    if w == 1 and h == 1:
+        for _ in range(d):
+            yield (x, y, z)
+            x, y, z = x + dcx, y + dcy, z + dcz
+        return
+
+    ax2, ay2, az2 = ax // 2, ay // 2, az // 2
+    bx2, by2, bz2 = bx // 2, by // 2, bz // 2
+    cx2, cy2, cz2 = cx // 2, cy // 2, cz // 2
+
+    w2 = abs(ax2 + ay2 + az2)
+    h2 = abs(bx2 + by2 + bz2)
+    d2 = abs(cx2 + cy2 + cz2)
+
+    # prefer even steps
+    if (w2 % 2) and (w > 2):
+        ax2, ay2, az2 = ax2 + dax, ay2 + day, az2 + daz
+    if (h2 % 2) and (h > 2):
+        bx2, by2, bz2 = bx2 + dbx, by2 + dby, bz2 + dbz
+    if (d2 % 2) and (d > 2):
+        cx2, cy2, cz2 = cx2 + dcx, cy2 + dcy, cz2 + dcz
+
+    if (2 * w > 3 * h) and (2 * w > 3 * d):
+        # wide case, split in w only
+        yield from _generate3d(x, y, z,
+                               ax2, ay2, az2,
+                               bx, by, bz,
+                               cx, cy, cz)
+        yield from _generate3d(x + ax2, y + ay2, z + az2,
+                               ax - ax2, ay - ay2, az - az2,
+                               bx, by, bz,
+                               cx, cy, cz)
+    elif 3 * h > 4 * d:
+        # do not split in d
+        yield from _generate3d(x, y, z,
+                               bx2, by2, bz2,
+                               cx, cy, cz,
+                               ax2, ay2, az2)
+        yield from _generate3d(x + bx2, y + by2, z + bz2,
+                               ax, ay, az,
+                               bx - bx2, by - by2, bz - bz2,
+                               cx, cy, cz)
+        yield from _generate3d(x + (ax - dax) + (bx2 - dbx),
+                               y + (ay - day) + (by2 - dby),
+                               z + (az - daz) + (bz2 - dbz),
+                               -bx2, -by2, -bz2,
+                               cx, cy, cz,
+                               -(ax - ax2), -(ay - ay2), -(az - az2))
+    elif 3 * d > 4 * h:
+        # do not split in h
+        yield from _generate3d(x, y, z,
+                               cx2, cy2, cz2,
+                               ax2, ay2, az2,
+                               bx, by, bz)
+        yield from _generate3d(x + cx2, y + cy2, z + cz2,
+                               ax, ay, az,
+                               bx, by, bz,
+                               cx - cx2, cy - cy2, cz - cz2)
+        yield from _generate3d(x + (ax - dax) + (cx2 - dcx),
+                               y + (ay - day) + (cy2 - dcy),
+                               z + (az - daz) + (cz2 - dcz),
+                               -cx2, -cy2, -cz2,
+                               -(ax - ax2), -(ay - ay2), -(az - az2),
+                               bx, by, bz)
+    else:
+        # regular case, split in all w/h/d
+        yield from _generate3d(x, y, z,
+                               bx2, by2, bz2,
+                               cx2, cy2, cz2,
+                               ax2, ay2, az2)
+        yield from _generate3d(x + bx2, y + by2, z + bz2,
+                               cx, cy, cz,
+                               ax2, ay2, az2,
+                               bx - bx2, by - by2, bz - bz2)
+        yield from _generate3d(x + (bx2 - dbx) + (cx - dcx),
+                               y + (by2 - dby) + (cy - dcy),
+                               z + (bz2 - dbz) + (cz - dcz),
+                               ax, ay, az,
+                               -bx2, -by2, -bz2,
+                               -(cx - cx2), -(cy - cy2), -(cz - cz2))
+        yield from _generate3d(x + (ax - dax) + bx2 + (cx - dcx),
+                               y + (ay - day) + by2 + (cy - dcy),
+                               z + (az - daz) + bz2 + (cz - dcz),
+                               -cx, -cy, -cz,
+                               -(ax - ax2), -(ay - ay2), -(az - az2),
+                               bx - bx2, by - by2, bz - bz2)
+        yield from _generate3d(x + (ax - dax) + (bx2 - dbx),
+                               y + (ay - day) + (by2 - dby),
+                               z + (az - daz) + (bz2 - dbz),
+                               -bx2, -by2, -bz2,
+                               cx2, cy2, cz2,
+                               -(ax - ax2), -(ay - ay2), -(az - az2))
@@ -0,0 +1,301 @@
+import os
+import sqlite3
+from collections import deque
+from time import sleep, time
+from uuid import uuid4
+
+from cloudvolume.lib import Bbox
+from tqdm import tqdm
+
+from chunkflow.lib.heartbeat import Heartbeat
+
+
+class SQLiteQueue(object):
+    """upload/fetch messages using a local SQLite database file.
+
+    This is a drop-in replacement of the AWS SQS queue for runs in a single
+    big node or a cluster sharing the database file. Every received message
+    is leased for a visibility timeout. The message will be visible again
+    for other workers if it was not deleted before the lease expires.
+
+    Note that SQLite file locking is not reliable in some network file systems.
+    Checkout the `documentation <https://www.sqlite.org/faq.html#q5>`_
+    """
+    def __init__(self,
+                 queue_name: str,
+                 visibility_timeout: int = 3600,
+                 wait_if_empty: int = 100,
+                 retry_times: int = 30,
+                 max_receive_count: int = None,
+                 max_number_of_messages: int = 1,
+                 delete_batch_size: int = 1,
+                 heartbeat_interval: int = None):
+        """
+        Parameters
+        ------------
+        queue_name:
+            the path of database file, such as `sqlite:///tmp/tasks.db`.
+            The `sqlite://` prefix is optional.
+        visibility_timeout:
+            make the task invisible for a while (seconds)
+        wait_if_empty:
+            wait for a while and continue fetching task if the queue is empty.
+        retry_times:
+            the times of retrying if the queue is empty.
+        max_receive_count:
+            the maximum times of receiving a message. The message will be
+            ignored if it was received too many times without deletion.
+            This is similar with the dead letter queue of AWS SQS.
+            The default is None and the message will be retried forever.
+        max_number_of_messages:
+            the number of messages fetched in one transaction.
+            The messages are buffered locally and handed out one by one.
+            A buffered message will be released back to the queue if more than 
+            half of the visibility timeout passed before it was handed out.
+        delete_batch_size:
+            the number of messages deleted in one transaction.
+            The deletion is deferred until the batch is full or the queue needs to
+            fetch new messages.
+        heartbeat_interval:
+            extend the lease of the messages in processing every interval 
+            (seconds) in a background thread until they are deleted.
+            The default is None without heartbeat.
+        """
+        self.queue_name = queue_name
+        if queue_name.startswith('sqlite://'):
+            queue_name = queue_name[len('sqlite://'):]
+        self.database_path = os.path.expanduser(queue_name)
+
+        if visibility_timeout is None:
+            # use the default visibility timeout of AWS SQS
+            visibility_timeout = 3600
+        self.visibility_timeout = visibility_timeout
+        self.wait_if_empty = wait_if_empty
+        self.retry_times = retry_times
+        self.max_receive_count = max_receive_count
+        self.max_number_of_messages = max_number_of_messages
+        self.delete_batch_size = delete_batch_size
+
+        # buffered messages of (receive time, receipt handle, body)
+        self._message_buffer = deque()
+        # receipt handles waiting for batch deletion
+        self._deleting_receipt_handles = []
+
+        if heartbeat_interval:
+            self._heartbeat = Heartbeat(heartbeat_interval, self._extend_lease)
+        else:
+            self._heartbeat = None
+
+        # autocommit mode, the transactions are managed explicitly
+        self.connection = sqlite3.connect(self.database_path,
+                                          timeout=60,
+                                          isolation_level=None)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            body TEXT NOT NULL,
+            visible_time REAL NOT NULL DEFAULT 0,
+            receive_count INTEGER NOT NULL DEFAULT 0,
+            receipt_handle TEXT)""")
+        self.connection.execute(
+            """CREATE INDEX IF NOT EXISTS messages_visible_time
+            ON messages (visible_time)""")
+
+    def __iter__(self):
+        return self
+
+    def __len__(self):
+        """the number of messages in the queue including the invisible ones."""
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def receive_message_list(self, max_number_of_messages: int = 1):
+        """
+        lease a batch of visible messages.
+
+        Parameters
+        -----------
+        max_number_of_messages:
+            the maximum number of messages to receive.
+
+        Returns
+        --------
+        a list of (receipt_handle, body) tuples.
+        The list is empty if there is no visible message.
+        """
+        now = time()
+        sql = 'SELECT id, body FROM messages WHERE visible_time <= ?'
+        parameters = [now]
+        if self.max_receive_count:
+            sql += ' AND receive_count < ?'
+            parameters.append(self.max_receive_count)
+        sql += ' ORDER BY id LIMIT ?'
+        parameters.append(max_number_of_messages)
+
+        # lock the database for writing to avoid receiving the same
+        # message in multiple workers
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = self.connection.execute(sql, parameters).fetchall()
+            messages = []
+            for message_id, body in rows:
+                receipt_handle = f'{message_id}-{uuid4().hex}'
+                self.connection.execute(
+                    """UPDATE messages SET visible_time = ?,
+                    receive_count = receive_count + 1, receipt_handle = ?
+                    WHERE id = ?""",
+                    (now + self.visibility_timeout, receipt_handle, message_id))
+                messages.append((receipt_handle, body))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return messages
+
+    def _pop_message(self):
+        """hand out a buffered message with enough lease time left.
+
+        Returns
+        --------
+        receipt handle and message body. None if the buffer is empty.
+        """
+        expired_receipt_handles = []
+        message = None
+        while self._message_buffer:
+            receive_time, receipt_handle, body = self._message_buffer.popleft()
+            if time() - receive_time < self.visibility_timeout / 2:
+                message = (receipt_handle, body)
+                self._in_flight(receipt_handle)
+                break
+            else:
+                expired_receipt_handles.append(receipt_handle)
+
+        if expired_receipt_handles:
+            self._release(expired_receipt_handles)
+        return message
+
+    def _in_flight(self, receipt_handle: str):
+        """the message was handed out for processing."""
+        if self._heartbeat:
+            self._heartbeat.add(receipt_handle)
+
+    def _extend_lease(self, receipt_handles: list):
+        # this runs in the heartbeat thread and sqlite connection
+        # can not be shared across threads.
+        connection = sqlite3.connect(self.database_path, timeout=60)
+        with connection:
+            connection.executemany(
+                'UPDATE messages SET visible_time = ? WHERE receipt_handle = ?',
+                ((time() + self.visibility_timeout, handle) 
+                 for handle in receipt_handles))
+        connection.close()
+
+    def _release(self, receipt_handles: list):
+        """make the leased messages visible again."""
+        self.connection.executemany(
+            'UPDATE messages SET visible_time = 0 WHERE receipt_handle = ?',
+            ((handle, ) for handle in receipt_handles))
+
+    def __next__(self):
+        message = self._pop_message()
+        if message is not None:
+            return message
+
+        # this is a good time to clear the deferred deletion
+        self.flush()
+        receive_time = time()
+        messages = self.receive_message_list(
+            max_number_of_messages=self.max_number_of_messages)
+        if not messages:
+            # the queue is empty
+            if self.wait_if_empty and self.retry_times > 0:
+                # countdown the retry times
+                self.retry_times -= 1
+                print(f'the queue is empty, wait for {self.wait_if_empty} seconds'+
+                      f' and will retry {self.retry_times} times.')
+
+                sleep(self.wait_if_empty)
+                # contine trying to receive message
+                return self.__next__()
+            else:
+                self.close()
+                raise StopIteration
+        else:
+            self._message_buffer.extend(
+                (receive_time, handle, body) for handle, body in messages[1:])
+            self._in_flight(messages[0][0])
+            return messages[0]
+
+    def delete(self, receipt_handle: str):
+        """
+        Parameters
+        -----------
+        receipt_handle:
+            a random string as a handle of the message in queue.
+            The message will not be deleted if it was received by
+            another worker after the lease expired.
+        """
+        self._deleting_receipt_handles.append(receipt_handle)
+        if len(self._deleting_receipt_handles) >= self.delete_batch_size:
+            self.flush()
+
+    def flush(self):
+        """delete the messages waiting for batch deletion."""
+        if self._deleting_receipt_handles:
+            with self.connection:
+                self.connection.execute('BEGIN')
+                self.connection.executemany(
+                    'DELETE FROM messages WHERE receipt_handle = ?',
+                    ((handle, ) for handle in self._deleting_receipt_handles))
+            if self._heartbeat:
+                for handle in self._deleting_receipt_handles:
+                    self._heartbeat.discard(handle)
+            self._deleting_receipt_handles.clear()
+
+    def close(self):
+        """delete the deferred messages and release the buffered messages."""
+        self.flush()
+        if self._heartbeat:
+            self._heartbeat.stop()
+        if self._message_buffer:
+            self._release([m[1] for m in self._message_buffer])
+            self._message_buffer.clear()
+
+    def send_message(self, message: str):
+        self.send_message_list([message])
+
+    def send_message_list(self, message_list: list, batch_size: int = 1000):
+        '''
+        Use batch mode to send a bunch of messages quickly.
+
+        Parameters
+        -----------
+        message_list:
+            an iterable of input messages. the messages are string or Bbox.
+            It could be a generator, and the messages are consumed in streaming.
+        batch_size:
+            the number of messages inserted in one transaction.
+        '''
+        def _insert(bodies):
+            with self.connection:
+                self.connection.execute('BEGIN')
+                self.connection.executemany(
+                    'INSERT INTO messages (body) VALUES (?)',
+                    ((body, ) for body in bodies))
+            bodies.clear()
+
+        if hasattr(message_list, '__len__'):
+            total = len(message_list)
+        else:
+            total = None
+
+        bodies = []
+        for message in tqdm(message_list, total=total,
+                            desc='sending messages to sqlite queue: '):
+            if isinstance(message, Bbox):
+                message = message.to_filename()
+            bodies.append(message)
+            if len(bodies) == batch_size:
+                _insert(bodies)
+
+        if bodies:
+            _insert(bodies)
@@ -0,0 +1,22 @@
+from .aws.sqs_queue import SQSQueue
+from .sqlite_queue import SQLiteQueue
+
+
+def get_queue(queue_name: str, **kwargs):
+    """
+    create a task queue selected by the scheme of queue name.
+
+    Parameters
+    ------------
+    queue_name:
+        `sqlite:///path/of/tasks.db` will use a local SQLite database file.
+        `sqs://my-queue` or a plain name, such as `my-queue`, will use AWS SQS.
+    kwargs:
+        the parameters passed to the queue constructor.
+    """
+    if queue_name.startswith('sqlite://'):
+        return SQLiteQueue(queue_name, **kwargs)
+    elif queue_name.startswith('sqs://'):
+        return SQSQueue(queue_name[len('sqs://'):], **kwargs)
+    else:
+        return SQSQueue(queue_name, **kwargs)
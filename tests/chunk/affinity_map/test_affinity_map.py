@@ -1,11 +1,30 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from unittest import mock
+
 import numpy as np
 
+from chunkflow.chunk import reduce
 from chunkflow.chunk.affinity_map import AffinityMap
+from chunkflow.chunk.affinity_map.base import quantize
 
 def test_affinity_map_construction():
     arr = np.random.rand(3,3,4,5).astype(np.float32)
     aff = AffinityMap(arr, global_offset=(0, -1,-1,-1))
  
+
+
+def test_quantize():
+    arr = np.random.rand(3, 3, 4, 5).astype(np.float32)
+    aff = AffinityMap(arr, global_offset=(0, -1, -1, -1))
+    image = aff.quantize()
+    assert image.dtype == np.uint8
+    assert image.global_offset == (-1, -1, -1)
+    np.testing.assert_array_equal(image, (arr[-1] * 255).astype(np.uint8))
+
+    # the fortran ordered array is split along the last axis
+    with mock.patch.object(reduce, 'MIN_PARALLEL_SIZE', 0):
+        image = quantize(np.asfortranarray(arr[-1]), num_threads=2)
+    assert image.flags.f_contiguous
+    np.testing.assert_array_equal(image, (arr[-1] * 255).astype(np.uint8))
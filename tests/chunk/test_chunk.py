@@ -128,6 +128,138 @@ class Test3DChunk(unittest.TestCase):
             chunk.slices,
             (slice(0, 1), slice(-1, 2), slice(-1, 2), slice(-1, 2)))
 
+    def test_layout(self):
+        self.assertEqual(self.chunk.layout, 'C')
+        # no copy for C ordered array
+        self.assertIs(self.chunk.ascontiguousarray(), self.chunk)
+
+        chunk = Chunk(np.asfortranarray(self.chunk.array), self.global_offset)
+        self.assertEqual(chunk.layout, 'F')
+
+        chunk = self.chunk.crop_margin(margin_size=(1, 1, 1))
+        self.assertEqual(chunk.layout, 'strided')
+        chunk = chunk.ascontiguousarray()
+        self.assertEqual(chunk.layout, 'C')
+        self.assertEqual(chunk.global_offset, (0, 0, 0))
+        np.testing.assert_array_equal(chunk, self.chunk.array[1:-1, 1:-1, 1:-1])
+
+    def test_metadata_cache(self):
+        chunk = Chunk(np.zeros((2, 3, 4), dtype=np.uint8), 
+                      global_offset=np.array((1, 2, 3)))
+        self.assertEqual(chunk.global_offset, (1, 2, 3))
+        self.assertIs(chunk.bbox, chunk.bbox)
+        self.assertIs(chunk.slices, chunk.slices)
+
+        # the cached metadata is updated with offset and shape
+        chunk.global_offset = (0, 0, 0)
+        self.assertEqual(chunk.bbox, Bbox((0, 0, 0), (2, 3, 4)))
+        chunk.array = np.zeros((3, 3, 3), dtype=np.uint8)
+        self.assertEqual(chunk.slices, 
+                         (slice(0, 3), slice(0, 3), slice(0, 3)))
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.chunk, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.chunk.foo = 1
+        # the operators still work without the numpy mixin
+        np.testing.assert_array_equal(self.chunk + 1, self.chunk.array + 1)
+        self.assertEqual((-self.chunk).global_offset, self.global_offset)
+
+    def test_cutout_save_blend(self):
+        chunk = Chunk(np.zeros((4, 5, 6), dtype=np.float32), (1, 2, 3))
+        patch = Chunk(np.ones((2, 3, 4), dtype=np.float32), (0, 4, 4))
+        chunk.blend(patch)
+        chunk.blend(patch)
+        expected = np.zeros((4, 5, 6), dtype=np.float32)
+        expected[0:1, 2:5, 1:5] = 2
+        np.testing.assert_array_equal(chunk, expected)
+
+        patch = chunk.cutout((slice(1, 3), slice(4, 6), slice(4, 7)))
+        self.assertEqual(patch.global_offset, (1, 4, 4))
+        np.testing.assert_array_equal(patch, expected[0:2, 2:4, 1:4])
+        patch.array = patch.array + 1
+        chunk.save(patch)
+        expected[0:2, 2:4, 1:4] += 1
+        np.testing.assert_array_equal(chunk, expected)
+
+    def test_array_function(self):
+        chunk = Chunk(np.random.rand(1, 3, 4, 5).astype(np.float32), 
+                      (0, 1, 2, 3))
+        squeezed = np.squeeze(chunk, axis=0)
+        self.assertEqual(squeezed.global_offset, (1, 2, 3))
+        self.assertEqual(chunk.squeeze_channel().global_offset, (1, 2, 3))
+        self.assertEqual(np.squeeze(chunk).global_offset, (1, 2, 3))
+        transposed = np.transpose(squeezed, (1, 2, 0))
+        self.assertEqual(transposed.global_offset, (2, 3, 1))
+        np.testing.assert_array_equal(
+            transposed, np.transpose(chunk.array[0], (1, 2, 0)))
+        flipped = np.flip(squeezed, axis=0)
+        self.assertEqual(flipped.global_offset, (1, 2, 3))
+        np.testing.assert_array_equal(flipped, chunk.array[0, ::-1])
+
+        self.assertEqual(np.max(chunk), chunk.array.max())
+        self.assertAlmostEqual(np.sum(chunk), chunk.array.sum(), places=3)
+        projection = np.max(squeezed, axis=0)
+        self.assertEqual(projection.global_offset, (2, 3))
+        np.testing.assert_array_equal(projection, chunk.array[0].max(axis=0))
+        projection = np.mean(squeezed, axis=-1, keepdims=True)
+        self.assertEqual(projection.global_offset, (1, 2, 3))
+        self.assertEqual(projection.shape, (3, 4, 1))
+        self.assertTrue(np.all(chunk >= 0))
+        self.assertFalse(np.any(chunk > 1))
+        # the other functions work on the arrays
+        stacked = np.stack([squeezed, squeezed])
+        self.assertIsInstance(stacked, np.ndarray)
+        self.assertEqual(stacked.shape, (2, 3, 4, 5))
+
+    def test_is_all_zero(self):
+        arr = np.zeros((4, 6, 8), dtype=np.uint8)
+        chunk = Chunk(arr)
+        self.assertTrue(chunk.is_all_zero(block_size=16))
+        self.assertTrue(chunk == 0)
+        arr[3, 5, 7] = 1
+        self.assertTrue(chunk.any_nonzero(block_size=16))
+        self.assertFalse(chunk == 0)
+        # strided view
+        chunk = Chunk(arr[:, 1:, 1:8])
+        self.assertTrue(chunk.any_nonzero(block_size=4))
+        chunk = Chunk(arr[:3, 1:, 1:8])
+        self.assertTrue(chunk.is_all_zero(block_size=4))
+
+    def test_overlap_ufunc(self):
+        arr1 = np.random.rand(2, 4, 6).astype(np.float32)
+        arr2 = np.random.rand(3, 4, 5).astype(np.float32)
+        chunk1 = Chunk(arr1, global_offset=(0, 0, 0))
+        chunk2 = Chunk(arr2, global_offset=(1, 2, 3))
+        result = chunk1 * chunk2
+        self.assertEqual(result.global_offset, (1, 2, 3))
+        np.testing.assert_array_equal(result, arr1[1:2, 2:4, 3:6] * 
+                                      arr2[0:1, 0:2, 0:3])
+        result = np.maximum(chunk2, chunk1)
+        self.assertEqual(result.shape, (1, 2, 3))
+
+        # only the intersection is modified in place
+        expected = arr1.copy()
+        expected[1:2, 2:4, 3:6] += arr2[0:1, 0:2, 0:3]
+        chunk1 += chunk2
+        np.testing.assert_array_equal(chunk1, expected)
+        self.assertIs(chunk1.array, arr1)
+        chunk1.add_overlap(chunk2)
+        expected[1:2, 2:4, 3:6] += arr2[0:1, 0:2, 0:3]
+        np.testing.assert_array_equal(chunk1, expected)
+
+        # the scalars are broadcasted, but the arrays could not be aligned
+        result = np.add(chunk2, 1, out=chunk1)
+        expected[1:2, 2:4, 3:6] = arr2[0:1, 0:2, 0:3] + 1
+        np.testing.assert_array_equal(result, expected)
+        with self.assertRaises(ValueError):
+            np.add(chunk2, arr2, out=chunk1)
+
+        # broadcasting with different dimensions is not changed
+        affs = Chunk(np.ones((3, 2, 4, 6), dtype=np.float32), (0, 0, 0, 0))
+        result = affs * Chunk(arr1)
+        self.assertEqual(result.shape, (3, 2, 4, 6))
+
     def test_where(self):
         arr = np.asarray([0.1, 0.7])
         selected1 = np.where(arr > 0.5)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+import numpy as np
+
+from chunkflow.chunk import Chunk
+from chunkflow.chunk import reduce
+
+
+def test_blockwise_reduce():
+    np.random.seed(0)
+    arr = np.random.rand(3, 5, 7, 9).astype(np.float32)
+    # split the small array to blocks
+    with mock.patch.object(reduce, 'MIN_PARALLEL_SIZE', 0):
+        for num_threads in (1, 2, 4, 8):
+            assert reduce.reduce_max(arr, num_threads) == arr.max()
+            assert reduce.reduce_min(arr, num_threads) == arr.min()
+            np.testing.assert_allclose(
+                reduce.reduce_sum(arr, np.float64, num_threads),
+                arr.sum(dtype=np.float64))
+            assert reduce.count_nonzero(arr > 0.5, num_threads) == \
+                np.count_nonzero(arr > 0.5)
+
+            hist, bin_edges = reduce.histogram(arr, bins=7,
+                                               num_threads=num_threads)
+            expected, expected_edges = np.histogram(arr, bins=7)
+            np.testing.assert_array_equal(hist, expected)
+            np.testing.assert_array_equal(bin_edges, expected_edges)
+
+        # the strided array
+        view = arr[:, 1:, :, ::2]
+        assert reduce.reduce_max(view, 4) == view.max()
+        hist, _ = reduce.histogram(view, bins=[0, 0.2, 0.9, 1],
+                                   num_threads=4)
+        np.testing.assert_array_equal(
+            hist, np.histogram(view, bins=[0, 0.2, 0.9, 1])[0])
+
+
+def test_chunk_max_min():
+    arr = np.random.rand(2, 3, 4).astype(np.float32)
+    chunk = Chunk(arr, global_offset=(1, 2, 3))
+    assert chunk.max() == arr.max()
+    assert chunk.min() == arr.min()
+
+    projection = chunk.max(axis=0)
+    assert projection.global_offset == (2, 3)
+    np.testing.assert_array_equal(projection, arr.max(axis=0))
+    projection = chunk.min(axis=(1, 2), keepdims=True)
+    assert projection.global_offset == (1, 2, 3)
+    np.testing.assert_array_equal(projection,
+                                  arr.min(axis=(1, 2), keepdims=True))
+
+
+def test_threaded_channel_voting():
+    arr = np.random.rand(6, 5, 4, 3).astype(np.float32)
+    chunk = Chunk(arr, global_offset=(0, 1, 2, 3))
+    with mock.patch.object(reduce, 'MIN_PARALLEL_SIZE', 0):
+        for num_threads in (1, 2, 3, 8):
+            out = chunk.channel_voting(num_threads=num_threads)
+            assert out.global_offset == (1, 2, 3)
+            np.testing.assert_array_equal(out, np.argmax(arr, axis=0) + 1)
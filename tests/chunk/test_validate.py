@@ -1,7 +1,9 @@
 import numpy as np
 import unittest
 
-from chunkflow.chunk.validate import validate_by_template_matching
+from skimage.feature import match_template
+
+from chunkflow.chunk.validate import validate_by_template_matching, _count_matches
 
 
 class TestValidateByTemplateMatching(unittest.TestCase):
@@ -13,3 +15,25 @@ class TestValidateByTemplateMatching(unittest.TestCase):
         # make a black box
         image[16:-16, 16:-16, 16:-16] = 0
         assert not validate_by_template_matching(image)
+
+    def test_same_with_match_template(self):
+        image = np.random.randint(0, 256, size=(20, 30, 40), dtype=np.uint8)
+        image[3:15, 5:20, 4:30] = 0
+        # some random black voxels
+        image[np.random.rand(*image.shape) < 0.2] = 0
+        binary = image.astype(bool)
+
+        for axis in range(3):
+            shape = [7, 7, 7]
+            shape[axis] = 2
+            counts = []
+            for plane in range(2):
+                template = np.zeros(shape, dtype=bool)
+                template[(slice(None), ) * axis + (plane, )] = True
+                result = match_template(binary, template)
+                counts.append(np.count_nonzero(result > 0.9))
+            self.assertEqual(tuple(counts), _count_matches(image, axis, 0.9))
+
+
+if __name__ == '__main__':
+    unittest.main()
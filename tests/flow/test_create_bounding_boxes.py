@@ -0,0 +1,35 @@
+import unittest
+
+from cloudvolume.lib import Bbox
+
+from chunkflow.flow.create_bounding_boxes import create_bounding_boxes
+
+
+class TestCreateBoundingBoxes(unittest.TestCase):
+    def test_create_bounding_boxes(self):
+        bboxes = create_bounding_boxes((4, 8, 8), chunk_overlap=(1, 2, 2),
+                                       roi_start=(0, 0, 0),
+                                       grid_size=(2, 3, 4), verbose=False)
+        self.assertEqual(len(bboxes), 24)
+        bbox_list = list(bboxes)
+        self.assertEqual(len(bbox_list), 24)
+        self.assertEqual(bbox_list[0], Bbox.from_delta((0, 0, 0), (4, 8, 8)))
+        self.assertEqual(bbox_list[-1], Bbox.from_delta((3, 12, 18), (4, 8, 8)))
+        # the bounding boxes could be iterated again
+        self.assertEqual(list(bboxes), bbox_list)
+
+    def test_order(self):
+        bboxes = create_bounding_boxes((4, 8, 8), roi_start=(0, 0, 0),
+                                       grid_size=(2, 4, 4), verbose=False,
+                                       order='hilbert')
+        self.assertEqual(len(bboxes), 32)
+        bbox_list = list(bboxes)
+        self.assertEqual(len(set(bbox_list)), 32)
+        for previous, current in zip(bbox_list[:-1], bbox_list[1:]):
+            # consecutive chunks are neighbors
+            distance = (current.minpt - previous.minpt) // (4, 8, 8)
+            self.assertEqual(sum(abs(d) for d in distance), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
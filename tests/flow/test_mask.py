@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+
+import numpy as np
+from cloudvolume import CloudVolume
+
+from chunkflow.chunk import Chunk
+from chunkflow.flow.create_bounding_boxes import create_bounding_boxes
+from chunkflow.flow.mask import MaskOperator
+
+
+def test_foreground_bitmap():
+    tempdir = tempfile.mkdtemp()
+    volume_path = 'file://' + tempdir
+    # the mask in mip 2 with zyx order
+    mask = np.zeros((8, 16, 16), dtype=np.uint8)
+    mask[2, 3, 5] = 1
+    mask[6, 12:14, 9] = 1
+    CloudVolume.from_numpy(np.transpose(mask), vol_path=volume_path,
+                           chunk_size=(8, 8, 4), layer_type='image')
+    # the mask volume is created in mip 0, so we use it as mip 2 by
+    # shifting the chunk mip
+    mask_operator = MaskOperator(volume_path, 0, -2, verbose=False)
+    bboxes = create_bounding_boxes((4, 12, 12), chunk_overlap=(0, 2, 2),
+                                   roi_start=(0, 2, 2), grid_size=(2, 6, 6),
+                                   verbose=False)
+    foreground = mask_operator.foreground_bitmap(bboxes)
+    assert foreground.shape == (2, 6, 6)
+
+    for bbox in bboxes:
+        idx = bboxes.grid_index(bbox)
+        z0, y0, x0 = bbox.minpt
+        z1, y1, x1 = bbox.maxpt
+        expected = np.any(mask[z0:z1, y0 // 4:-(-y1 // 4), x0 // 4:-(-x1 // 4)])
+        assert foreground[idx] == expected
+
+    bboxes.exclude(~foreground)
+    assert len(bboxes) == np.count_nonzero(foreground)
+    assert 0 < len(bboxes) < 72
+
+    mask_operator.inverse = True
+    assert np.all(mask_operator.foreground_bitmap(bboxes))
+    shutil.rmtree(tempdir)
+
+
+def test_maskout():
+    tempdir = tempfile.mkdtemp()
+    volume_path = 'file://' + tempdir
+    mask = (np.random.rand(4, 8, 8) > 0.5).astype(np.uint8)
+    CloudVolume.from_numpy(np.transpose(mask), vol_path=volume_path,
+                           chunk_size=(4, 4, 2), layer_type='image')
+    image = np.random.randint(1, 255, size=(3, 2, 8, 12), dtype=np.uint8)
+    expected = image * np.repeat(np.repeat(mask[1:3, 2:4, 1:4], 4, axis=1),
+                                 4, axis=2)
+    # the mask is created in mip 0, shift the chunk mip to get factor 4
+    for preload in (False, True):
+        mask_operator = MaskOperator(volume_path, 0, -2, verbose=False,
+                                     preload=preload)
+        chunk = Chunk(image.copy(), global_offset=(0, 1, 8, 4))
+        chunk = mask_operator(chunk)
+        np.testing.assert_array_equal(chunk, expected)
+
+        # the strided chunk is masked out with upsampled mask
+        arr = np.asfortranarray(image)
+        chunk = mask_operator(Chunk(arr, global_offset=(0, 1, 8, 4)))
+        np.testing.assert_array_equal(chunk, expected)
+    shutil.rmtree(tempdir)
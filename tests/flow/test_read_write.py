@@ -3,6 +3,14 @@ import numpy as np
 import os
 import shutil
 
+from cloudvolume.lib import Bbox
+
+try:
+    import zarr
+except ImportError:
+    # zarr is an optional dependency
+    zarr = None
+
 from chunkflow.chunk import Chunk
 from chunkflow.flow.save_pngs import SavePNGsOperator
 
@@ -60,6 +68,74 @@ class TestReadWrite(unittest.TestCase):
         chunk = Chunk(arr, global_offset=(0, 1, 2, 3))
         read_write_h5(chunk)
 
+    def test_read_h5_bbox(self):
+        arr = np.random.rand(3, 8, 16, 16).astype(np.float32)
+        chunk = Chunk(arr, global_offset=(0, 1, 2, 3))
+        file_name = 'test.h5'
+        for compression in (None, 'gzip', 'lzf', 'blosc'):
+            chunk.to_h5(file_name, chunk_size=(4, 8, 8), compression=compression)
+            bbox = Bbox.from_delta((2, 4, 6), (4, 8, 8))
+            chunk2 = Chunk.from_h5(file_name, bbox=bbox)
+            assert chunk2.global_offset == (0, 2, 4, 6)
+            np.testing.assert_array_equal(chunk2, arr[:, 1:5, 2:10, 3:11])
+        os.remove(file_name)
+    def test_read_tif_bbox(self):
+        arr = np.random.randint(0, 256, size=(8, 16, 16), dtype=np.uint8)
+        file_name = 'test.tif'
+        Chunk(arr).to_tif(file_name)
+        bbox = Bbox.from_delta((3, 4, 6), (4, 8, 8))
+        chunk = Chunk.from_tif(file_name, global_offset=(1, 2, 3), bbox=bbox)
+        assert chunk.global_offset == (3, 4, 6)
+        np.testing.assert_array_equal(chunk, arr[2:6, 2:10, 3:11])
+
+        # the pages of a strided array
+        view = arr.transpose(2, 1, 0)[::2]
+        Chunk(view).to_tif(file_name)
+        np.testing.assert_array_equal(Chunk.from_tif(file_name), view)
+        os.remove(file_name)
+    def test_read_tif_memmap(self):
+        arr = np.random.rand(2, 8, 16, 16).astype(np.float32)
+        file_name = 'test.tif'
+        Chunk(arr).to_tif(file_name)
+        chunk = Chunk.from_tif(file_name, memmap=True)
+        assert isinstance(chunk.array, np.memmap)
+        np.testing.assert_array_equal(chunk, (arr * 255).astype(np.uint8))
+
+        bbox = Bbox.from_delta((3, 4, 6), (4, 8, 8))
+        chunk = Chunk.from_tif(file_name, global_offset=(0, 1, 2, 3),
+                               bbox=bbox, memmap=True)
+        assert chunk.global_offset == (0, 3, 4, 6)
+        np.testing.assert_array_equal(
+            chunk, (arr[:, 2:6, 2:10, 3:11] * 255).astype(np.uint8))
+        # the modification is not written to the file
+        chunk.array[:] = 0
+        del chunk
+        np.testing.assert_array_equal(Chunk.from_tif(file_name),
+                                      (arr * 255).astype(np.uint8))
+        os.remove(file_name)
+
+    @unittest.skipIf(zarr is None, 'zarr is not installed')
+    def test_read_write_zarr(self):
+        arr = np.random.rand(3, 8, 16, 16).astype(np.float32)
+        for path in ('test.zarr', 'test.n5'):
+            chunk = Chunk(arr, global_offset=(0, 1, 2, 3))
+            # the array should be created first
+            with self.assertRaises(ValueError):
+                chunk.to_zarr(path)
+            Chunk.create_zarr(path, (1, 2, 3), (8, 16, 32), (4, 8, 8),
+                              num_channels=3)
+            # two tasks write to the same array
+            for x in (3, 19):
+                Chunk(arr, global_offset=(0, 1, 2, x)).to_zarr(path)
+            # the misaligned chunk is rejected
+            with self.assertRaises(ValueError):
+                Chunk(arr[:, :, :, :8], global_offset=(0, 1, 2, 7)).to_zarr(path)
+            bbox = Bbox.from_delta((2, 4, 15), (4, 8, 8))
+            chunk = Chunk.from_zarr(path, bbox=bbox)
+            assert chunk.global_offset == (0, 2, 4, 15)
+            np.testing.assert_array_equal(chunk[:, :, :, :4], arr[:, 1:5, 2:10, 12:16])
+            np.testing.assert_array_equal(chunk[:, :, :, 4:], arr[:, 1:5, 2:10, 0:4])
+            shutil.rmtree(path)
 
 if __name__ == '__main__':
     unittest.main()
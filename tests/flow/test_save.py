@@ -8,6 +8,7 @@ import numpy as np
 from cloudvolume import CloudVolume
 
 from chunkflow.chunk import Chunk
+from chunkflow.chunk.image import Image
 from chunkflow.flow.save import SaveOperator
 
 mip = 0
@@ -42,3 +43,72 @@ def test_save_image():
     
     sleep(2)
     shutil.rmtree(tempdir)
+
+
+def test_save_pyramid():
+    affs = np.random.rand(3, 4, 128, 128).astype(np.float32)
+    chunk = Chunk(affs, global_offset=(0, 0, 128, 128))
+    tempdir = tempfile.mkdtemp()
+    volume_path = 'file://' + tempdir
+    for path, num_channels, dtype in ((volume_path, 3, 'float32'),
+                                      (volume_path + '/thumbnail', 1, 'uint8')):
+        info = CloudVolume.create_new_info(
+            num_channels, 'image', dtype, 'raw', resolution=(4, 4, 40),
+            voxel_offset=(0, 0, 0), volume_size=(256, 256, 4),
+            chunk_size=(16, 16, 4))
+        vol = CloudVolume(path, info=info)
+        for _ in range(3):
+            vol.add_scale((2**(len(vol.info['scales'])), ) * 2 + (1, ))
+        vol.commit_info()
+
+    op = SaveOperator(volume_path, 0, upload_log=False, create_thumbnail=True,
+                      verbose=False, downsample_stop_mip=3)
+    op(chunk)
+
+    for mip in (1, 2):
+        vol = CloudVolume(volume_path, mip=mip)
+        factor = 2**mip
+        arr = vol[128 // factor:256 // factor, 128 // factor:256 // factor, 0:4]
+        expected = affs.reshape(3, 4, 128 // factor, factor, 
+                                128 // factor, factor).mean(axis=(3, 5))
+        np.testing.assert_allclose(np.transpose(arr), expected, rtol=1e-5)
+
+    # the thumbnail is downsampled until the size of underlying chunk
+    thumbnail = CloudVolume(volume_path + '/thumbnail', mip=3)
+    arr = thumbnail[16:32, 16:32, 0:4][..., 0]
+    expected = (affs[-1].reshape(4, 16, 8, 16, 8).mean(axis=(2, 4)) * 255)
+    assert np.max(np.abs(np.transpose(arr) - expected.astype(np.uint8))) <= 1
+    shutil.rmtree(tempdir)
+
+
+def test_auto_convert_dtype():
+    class Volume:
+        dtype = np.dtype(np.uint8)
+
+    affs = np.random.rand(3, 4, 16, 16).astype(np.float32) * 0.5
+    affs[0, 0, 0, 0] = 1.2
+    chunk = Chunk(affs, global_offset=(0, 1, 2, 3))
+    op = SaveOperator('file:///tmp/test-volume', 0, upload_log=False,
+                      verbose=False)
+    converted = op._auto_convert_dtype(chunk, Volume())
+    assert converted.dtype == np.uint8
+    assert converted.global_offset == (0, 1, 2, 3)
+    np.testing.assert_array_equal(
+        converted,
+        np.rint(affs * np.float32(255 / affs.max())).astype(np.uint8))
+
+    # the fixed scale clips the value out of range
+    op.chunk_max_value = 1.
+    converted = op._auto_convert_dtype(chunk, Volume())
+    np.testing.assert_array_equal(
+        converted, np.clip(np.rint(affs * 255), 0, 255).astype(np.uint8))
+
+    # the subclass is kept, and the maximum of uint64 does not overflow
+    Volume.dtype = np.dtype(np.uint64)
+    image = Image(np.array([[[0.5, 1.]]], dtype=np.float32))
+    op.chunk_max_value = None
+    converted = op._auto_convert_dtype(image, Volume())
+    assert isinstance(converted, Image)
+    assert converted.dtype == np.uint64
+    assert converted[0, 0, 0] == 2**63
+    assert converted[0, 0, 1] == 2**64 - 2048
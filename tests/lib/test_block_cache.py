@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from chunkflow.lib.block_cache import BlockCache, prune_disk_cache
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.rand(2, 20, 40, 40).astype(np.float32)
+        self.voxel_offset = (2, 4, 4)
+        self.fetched = []
+
+    def _fetch(self, slices):
+        self.fetched.append(slices)
+        # pad with zeros like the unbounded cutout of cloudvolume
+        out = np.zeros((2, ) + tuple(s.stop - s.start for s in slices),
+                       dtype=self.image.dtype)
+        src = []
+        dst = []
+        for s, o, n in zip(slices, self.voxel_offset, self.image.shape[1:]):
+            lo = max(s.start, o)
+            hi = min(s.stop, o + n)
+            src.append(slice(lo - o, hi - o))
+            dst.append(slice(lo - s.start, hi - s.start))
+        out[(slice(None), ) + tuple(dst)] = self.image[(slice(None), ) + tuple(src)]
+        return out
+
+    def _expected(self, slices):
+        return self._fetch(slices)
+
+    def test_cutout(self):
+        cache = BlockCache((4, 8, 8), self.voxel_offset, max_bytes=10**9)
+        slices = (slice(3, 11), slice(1, 17), slice(10, 30))
+        np.testing.assert_array_equal(cache.cutout(slices, self._fetch),
+                                      self._expected(slices))
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 3 * 3 * 4)
+
+        # the neighboring cutout reuses the overlapping blocks
+        self.fetched.clear()
+        slices = (slice(3, 11), slice(1, 17), slice(20, 44))
+        np.testing.assert_array_equal(cache.cutout(slices, self._fetch),
+                                      self._expected(slices))
+        self.assertEqual(cache.hits, 3 * 3 * 2)
+        self.assertEqual(cache.misses, 3 * 3 * 4 + 3 * 3 * 1)
+        # only the missing blocks were fetched
+        self.assertEqual(self.fetched[0],
+                         (slice(2, 14), slice(-4, 20), slice(36, 44)))
+
+    def test_eviction(self):
+        block_bytes = 2 * 4 * 8 * 8 * 4
+        cache = BlockCache((4, 8, 8), self.voxel_offset,
+                           max_bytes=4 * block_bytes)
+        slices = (slice(2, 6), slice(4, 12), slice(4, 52))
+        np.testing.assert_array_equal(cache.cutout(slices, self._fetch),
+                                      self._expected(slices))
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.nbytes, 4 * block_bytes)
+
+        # the recently used blocks are kept
+        slices = (slice(2, 6), slice(4, 12), slice(44, 52))
+        cache.cutout(slices, self._fetch)
+        self.assertEqual(cache.hits, 1)
+
+
+class TestPruneDiskCache(unittest.TestCase):
+    def test_prune_disk_cache(self):
+        cache_path = tempfile.mkdtemp()
+        for i in range(4):
+            file_path = os.path.join(cache_path, str(i))
+            with open(file_path, 'wb') as f:
+                f.write(b'0' * 100)
+            os.utime(file_path, (i, i))
+
+        self.assertEqual(prune_disk_cache(cache_path, 250), 200)
+        self.assertEqual(sorted(os.listdir(cache_path)), ['2', '3'])
+        self.assertEqual(prune_disk_cache(cache_path, 250), 0)
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
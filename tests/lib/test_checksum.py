@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from cloudvolume.lib import Bbox
+
+from chunkflow.lib.checksum import block_checksums, put_checksums, get_checksums
+
+
+class TestChecksum(unittest.TestCase):
+    def test_block_checksums(self):
+        image = np.random.randint(0, 256, size=(3, 20, 40, 40), dtype=np.uint8)
+        global_offset = (0, 1, 2, 4)
+        checksums = block_checksums(image, global_offset,
+                                    block_size=(8, 16, 16),
+                                    voxel_offset=(1, 0, 0))
+        # only the blocks fully inside the image
+        self.assertEqual(len(checksums), 2 * 1 * 1)
+        self.assertIn(Bbox.from_delta((1, 16, 16), (8, 16, 16)).to_filename(),
+                      checksums)
+
+        # the same block in another array has the same checksum
+        sub_image = image[:, 8:, 14:, 12:]
+        sub_checksums = block_checksums(sub_image, (0, 9, 16, 16),
+                                        block_size=(8, 16, 16),
+                                        voxel_offset=(1, 0, 0))
+        self.assertEqual(len(sub_checksums), 1)
+        for file_name, checksum in sub_checksums.items():
+            self.assertEqual(checksums[file_name], checksum)
+
+        # the checksum changes with the data
+        image[0, 10, 20, 20] += 1
+        modified_checksums = block_checksums(image, global_offset,
+                                             block_size=(8, 16, 16),
+                                             voxel_offset=(1, 0, 0))
+        changed = [k for k in checksums if checksums[k] != modified_checksums[k]]
+        self.assertEqual(changed, 
+                         [Bbox.from_delta((9, 16, 16), (8, 16, 16)).to_filename()])
+
+    def test_sidecar_files(self):
+        path = tempfile.mkdtemp()
+        checksums = {'0-8_0-16_0-16': '0a1b2c3d', '8-16_0-16_0-16': '00000001'}
+        put_checksums('file://' + path, checksums)
+        stored = get_checksums('file://' + path,
+                               list(checksums.keys()) + ['16-24_0-16_0-16'])
+        self.assertEqual(stored, checksums)
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
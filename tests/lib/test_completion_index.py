@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from cloudvolume.lib import Bbox
+
+from chunkflow.flow.create_bounding_boxes import create_bounding_boxes
+from chunkflow.lib.completion_index import CompletionIndex
+
+
+class TestCompletionIndex(unittest.TestCase):
+    def setUp(self):
+        self.volume_path = tempfile.mkdtemp()
+        log_path = os.path.join(self.volume_path, 'log')
+        os.makedirs(log_path)
+        # the log of 3D chunk, 4D chunk and a bounding box out of grid
+        for file_name in ['0-4_8-16_0-8', '0-3_4-8_0-8_8-16', '1-5_0-8_0-8',
+                          'summary']:
+            with open(os.path.join(log_path, file_name + '.json'), 'w') as f:
+                f.write('{}')
+
+    def tearDown(self):
+        shutil.rmtree(self.volume_path)
+
+    def test_completion_index(self):
+        index = CompletionIndex('file://' + self.volume_path, verbose=False)
+        self.assertEqual(len(index), 3)
+        self.assertIn(Bbox.from_delta((0, 8, 0), (4, 8, 8)), index)
+        self.assertIn('4-8_0-8_8-16', index)
+        self.assertNotIn('0-4_0-8_0-8', index)
+
+        index.mark(Bbox.from_delta((0, 0, 0), (4, 8, 8)))
+        self.assertIn('0-4_0-8_0-8', index)
+
+    def test_skip_completed_bounding_boxes(self):
+        index = CompletionIndex('file://' + self.volume_path, verbose=False)
+        bboxes = create_bounding_boxes((4, 8, 8), roi_start=(0, 0, 0),
+                                       grid_size=(2, 2, 2), verbose=False)
+        bitmap = index.bitmap(bboxes)
+        self.assertEqual(bitmap.sum(), 2)
+        self.assertTrue(bitmap[0, 1, 0])
+        self.assertTrue(bitmap[1, 0, 1])
+
+        bboxes.exclude(bitmap)
+        self.assertEqual(len(bboxes), 6)
+        bbox_list = list(bboxes)
+        self.assertEqual(len(bbox_list), 6)
+        for bbox in bbox_list:
+            self.assertNotIn(bbox, index)
+
+
+if __name__ == '__main__':
+    unittest.main()
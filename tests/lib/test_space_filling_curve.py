@@ -0,0 +1,47 @@
+import unittest
+from itertools import product
+
+from chunkflow.lib.space_filling_curve import grid_indices
+
+
+class TestSpaceFillingCurve(unittest.TestCase):
+    def _check_coverage(self, grid_size, order):
+        indices = list(grid_indices(grid_size, order=order))
+        # every grid cell is visited exactly once
+        self.assertEqual(sorted(indices),
+                         list(product(*[range(g) for g in grid_size])))
+        return indices
+
+    def _check_adjacency(self, indices):
+        for previous, current in zip(indices[:-1], indices[1:]):
+            distance = sum(abs(p - c) for p, c in zip(previous, current))
+            self.assertEqual(distance, 1)
+
+    def test_zyx(self):
+        indices = self._check_coverage((2, 3, 4), 'zyx')
+        self.assertEqual(indices[:2], [(0, 0, 0), (0, 0, 1)])
+
+    def test_morton(self):
+        indices = self._check_coverage((4, 4, 4), 'morton')
+        # the first octant is finished before moving on
+        self.assertEqual(sorted(indices[:8]),
+                         list(product(range(2), range(2), range(2))))
+        for grid_size in [(1, 5, 7), (3, 6, 2), (5, 1, 9)]:
+            self._check_coverage(grid_size, 'morton')
+
+    def test_hilbert(self):
+        for grid_size in [(4, 4, 4), (2, 6, 8), (1, 8, 6), (6, 1, 4),
+                          (4, 2, 1), (1, 1, 5), (8, 2, 2)]:
+            indices = self._check_coverage(grid_size, 'hilbert')
+            self._check_adjacency(indices)
+        # odd sizes are covered but could have a diagonal step
+        for grid_size in [(3, 5, 7), (1, 5, 4), (2, 3, 9)]:
+            self._check_coverage(grid_size, 'hilbert')
+
+    def test_invalid_order(self):
+        with self.assertRaises(ValueError):
+            grid_indices((2, 2, 2), order='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
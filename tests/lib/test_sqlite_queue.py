@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from time import sleep
+
+from cloudvolume.lib import Bbox
+
+from chunkflow.lib.task_queue import get_queue
+from chunkflow.lib.sqlite_queue import SQLiteQueue
+
+
+class TestSQLiteQueue(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.queue_name = 'sqlite://' + os.path.join(self.tempdir, 'tasks.db')
+        self.queue = get_queue(self.queue_name,
+                               wait_if_empty=None,
+                               retry_times=3)
+
+    def tearDown(self):
+        os.remove(os.path.join(self.tempdir, 'tasks.db'))
+        os.rmdir(self.tempdir)
+
+    def test_send_and_receive_message_list(self):
+        self.assertIsInstance(self.queue, SQLiteQueue)
+        message_list = [str(i) for i in range(23)]
+        self.queue.send_message_list(message_list)
+        self.assertEqual(len(self.queue), 23)
+
+        received = []
+        for receipt_handle, message in self.queue:
+            received.append(int(message))
+            self.queue.delete(receipt_handle)
+        self.assertEqual(received, list(range(23)))
+        self.assertEqual(len(self.queue), 0)
+
+    def test_bbox_message(self):
+        bbox = Bbox.from_delta((0, 1, 2), (3, 4, 5))
+        self.queue.send_message_list([bbox])
+        _, message = next(self.queue)
+        self.assertEqual(Bbox.from_filename(message), bbox)
+
+    def test_visibility_timeout(self):
+        queue = SQLiteQueue(self.queue_name,
+                            visibility_timeout=1,
+                            wait_if_empty=None)
+        queue.send_message('task')
+        old_handle, _ = next(queue)
+        # the message is leased, so another worker will not get it
+        self.assertEqual(queue.receive_message_list(), [])
+        sleep(1.1)
+        # the lease expired, the message is visible again
+        new_handle, message = next(queue)
+        self.assertEqual(message, 'task')
+        # the expired lease can not delete the message anymore
+        queue.delete(old_handle)
+        self.assertEqual(len(queue), 1)
+        queue.delete(new_handle)
+        self.assertEqual(len(queue), 0)
+
+    def test_max_receive_count(self):
+        queue = SQLiteQueue(self.queue_name,
+                            visibility_timeout=0,
+                            wait_if_empty=None,
+                            max_receive_count=2)
+        queue.send_message('task')
+        self.assertEqual(len(queue.receive_message_list()), 1)
+        self.assertEqual(len(queue.receive_message_list()), 1)
+        # the message was received too many times
+        self.assertEqual(queue.receive_message_list(), [])
+
+    def test_batch_receive(self):
+        self.queue.send_message_list([str(i) for i in range(5)])
+        messages = self.queue.receive_message_list(max_number_of_messages=3)
+        self.assertEqual([m for _, m in messages], ['0', '1', '2'])
+        messages = self.queue.receive_message_list(max_number_of_messages=3)
+        self.assertEqual([m for _, m in messages], ['3', '4'])
+
+    def test_buffered_fetch_and_deferred_delete(self):
+        queue = SQLiteQueue(self.queue_name,
+                            wait_if_empty=None,
+                            max_number_of_messages=4,
+                            delete_batch_size=3)
+        queue.send_message_list([str(i) for i in range(10)])
+
+        receipt_handle, message = next(queue)
+        self.assertEqual(message, '0')
+        # the other fetched messages are leased in the local buffer
+        self.assertEqual(len(queue._message_buffer), 3)
+        queue.delete(receipt_handle)
+        # the deletion was deferred
+        self.assertEqual(len(queue), 10)
+
+        received = [message]
+        for receipt_handle, message in queue:
+            received.append(message)
+            queue.delete(receipt_handle)
+        self.assertEqual(received, [str(i) for i in range(10)])
+        # the remaining deletion was flushed in the end
+        self.assertEqual(len(queue), 0)
+
+    def test_heartbeat(self):
+        queue = SQLiteQueue(self.queue_name,
+                            visibility_timeout=1,
+                            wait_if_empty=None,
+                            heartbeat_interval=0.2)
+        queue.send_message_list(['0', '1'])
+        receipt_handle, _ = next(queue)
+        sleep(1.5)
+        # the lease of message in processing was extended
+        messages = self.queue.receive_message_list(10)
+        self.assertEqual([m for _, m in messages], ['1'])
+
+        queue.delete(receipt_handle)
+        queue.close()
+        self.assertEqual(len(queue), 1)
+
+    def test_close_release_buffered_messages(self):
+        queue = SQLiteQueue(self.queue_name,
+                            wait_if_empty=None,
+                            max_number_of_messages=4)
+        queue.send_message_list([str(i) for i in range(4)])
+        next(queue)
+        queue.close()
+        # the 3 buffered messages are visible again
+        self.assertEqual(len(self.queue.receive_message_list(10)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()